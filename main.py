@@ -1,9 +1,39 @@
 import os
+import re
 import json
 import shutil
 import requests
 import sys
-from flask import Flask, send_from_directory, request, jsonify
+import threading
+import time
+import fcntl
+import tempfile
+import hashlib
+import mimetypes
+import codecs
+import gzip
+import sqlite3
+import socket
+import http.client
+import itertools
+import atexit
+import cProfile
+import hmac
+import random
+from xml.etree import ElementTree
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from flask import Flask, send_from_directory, request, jsonify, abort, Response
+
+# Brotli is optional; without it responses are compressed with gzip only.
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # --- Configuration ---
 CONFIG_DIR = '/app/config'
@@ -13,6 +43,90 @@ LINKS_FILE = os.path.join(DATA_DIR, 'links.json')
 SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
 NOTES_FILE = os.path.join(DATA_DIR, 'notes.json')
 
+# --- Profile Configuration ---
+# The default profile lives directly in DATA_DIR; named profiles get their own
+# sub-directory under PROFILES_DIR and are served from /p/<name>/.
+PROFILES_DIR = os.path.join(DATA_DIR, 'profiles')
+DEFAULT_PROFILE = 'default'
+PROFILE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+# Named profiles are created by their first write, or up front by listing them in PROFILES (e.g. "kids,work").
+CONFIGURED_PROFILES = [name.strip() for name in os.environ.get('PROFILES', '').split(',') if name.strip()]
+MAX_CACHED_PROFILES = int(os.environ.get('MAX_CACHED_PROFILES', '32'))
+PROFILE_IDLE_TIMEOUT = int(os.environ.get('PROFILE_IDLE_TIMEOUT', '900'))
+
+# --- Notes Configuration ---
+NOTE_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+NOTE_DOC_PREFIX = 'note:'
+# The largest page of a note's text one read returns, in characters; the frontend's NOTE_PAGE_SIZE matches it.
+NOTE_PAGE_SIZE = 256 * 1024
+# The note that stands in for the single scratchpad of earlier versions, for clients still using that API.
+LEGACY_NOTE_ID = 'scratchpad'
+
+# --- Change Feed Configuration ---
+# Every commit is recorded in a short per-profile log; clients follow it to apply edits
+# made on other devices. Documents in FEED_INLINE_DOCS are sent along with the change; links
+# changes carry a patch of the sections that changed, up to FEED_PATCH_MAX_SIZE bytes.
+CHANGE_LOG_SIZE = 200
+FEED_INLINE_DOCS = ('settings',)
+FEED_PATCH_MAX_SIZE = 64 * 1024
+FEED_POLL_INTERVAL = 0.5
+FEED_MAX_WAIT = 55
+FEED_HEARTBEAT_INTERVAL = 15
+FEED_STREAM_LIFETIME = 300
+
+# --- Click Tracking Configuration ---
+# Link clicks are counted in memory and written to each profile's .clicks.json every
+# CLICK_FLUSH_INTERVAL seconds. A link's score halves for every CLICK_HALF_LIFE_DAYS without clicks.
+CLICK_FLUSH_INTERVAL = float(os.environ.get('CLICK_FLUSH_INTERVAL', '10'))
+CLICK_HALF_LIFE = float(os.environ.get('CLICK_HALF_LIFE_DAYS', '14')) * 86400
+CLICK_MAX_TRACKED = 1000
+CLICK_MAX_URL_LENGTH = 2048
+
+# --- Request Profiling Configuration ---
+# Off unless REQUEST_PROFILING=true and PROFILING_TOKEN is set. Requests sending the token in an
+# X-Profile-Token header are profiled, as is a random PROFILING_SAMPLE_RATE fraction of all requests.
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', 'false').lower() == 'true'
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DIR = os.path.join(CONFIG_DIR, 'profiling')
+PROFILING_MAX_FILES = 200
+
+# --- Shared Cache Configuration ---
+# All gunicorn workers share one SQLite cache, so upstream fetches are made once per TTL, not once per worker.
+SHARED_CACHE_FILE = os.path.join(DATA_DIR, 'cache.sqlite3')
+UK_CACHE_TTL = int(os.environ.get('UK_CACHE_TTL', '30'))
+
+# --- Uptime Kuma Configuration ---
+# UK_URL holds one or more instances separated by commas, each `url` or `url|status-page-slug`.
+UK_DEFAULT_SLUG = 'all-checks'
+UK_TIMEOUT = float(os.environ.get('UK_TIMEOUT', '10'))
+# Monitor URLs, used to show each link's status, change rarely and are fetched less often than heartbeats.
+UK_MONITORS_TTL = int(os.environ.get('UK_MONITORS_TTL', '300'))
+
+# --- Widget Configuration ---
+# WIDGETS lists the optional widgets to show (e.g. "host,docker,rss"); the Uptime Kuma
+# widget is enabled automatically when UK_URL is set.
+WIDGET_WORKERS = int(os.environ.get('WIDGET_WORKERS', '4'))
+WIDGET_WAIT_TIMEOUT = UK_TIMEOUT + 1
+DOCKER_SOCKET = os.environ.get('DOCKER_SOCKET', '/var/run/docker.sock')
+RSS_FEEDS = [url.strip() for url in os.environ.get('RSS_FEEDS', '').split(',') if url.strip()]
+RSS_MAX_ITEMS = int(os.environ.get('RSS_MAX_ITEMS', '5'))
+SHARED_BODY_TTL = 3600
+
+# --- Front-end Build Configuration ---
+# The front-end is minified and bundled when served; set MINIFY_ASSETS=false to serve readable code.
+MINIFY_ASSETS = os.environ.get('MINIFY_ASSETS', 'true').lower() != 'false'
+
+# --- Static Snapshot Configuration ---
+# With SNAPSHOT_DIR set, every profile's page is also written there as static files, on startup and
+# after each save, so a web server such as nginx can serve reads without the app.
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', '').strip()
+SNAPSHOT_ASSET_GRACE = 3600  # Seconds that replaced bundles stay available to pages loaded before a rebuild
+
+# --- Compression Configuration ---
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+MAX_REQUEST_BODY_SIZE = int(os.environ.get('MAX_REQUEST_BODY_SIZE', str(64 * 1024 * 1024)))
+
 # --- Default File Content ---
 DEFAULT_HTML = """
 <!DOCTYPE html>
@@ -53,6 +167,7 @@ DEFAULT_HTML = """
                 <button id="save-button" class="hidden">Save Changes</button>
             </div>
         </header>
+        <div id="widgets-container"></div>
         <main id="links-container">
             <!-- Links will be dynamically loaded here -->
         </main>
@@ -62,9 +177,15 @@ DEFAULT_HTML = """
     <div id="notepad-modal" class="modal-overlay">
         <div class="modal-content">
             <h2>Scratchpad</h2>
+            <div class="notepad-toolbar">
+                <select id="note-select"></select>
+                <input type="text" id="note-title-input" placeholder="Title">
+                <button type="button" id="new-note-button">New Note</button>
+            </div>
             <textarea id="notepad-textarea" placeholder="Type your notes here..."></textarea>
+            <span id="note-status"></span>
             <div class="modal-actions">
-                <button id="delete-all-notes-button" class="button-danger">Delete All</button>
+                <button id="delete-note-button" class="button-danger">Delete</button>
                 <div style="flex-grow: 1;"></div> <!-- Spacer -->
                 <button id="discard-notepad-button">Discard Changes</button>
                 <button id="save-notepad-button">Save</button>
@@ -75,12 +196,11 @@ DEFAULT_HTML = """
     <!-- Delete Confirmation Modal -->
     <div id="delete-confirm-modal" class="modal-overlay">
         <div class="modal-content">
-            <h2>Delete All Notes?</h2>
+            <h2>Delete This Note?</h2>
             <p>This action cannot be undone.</p>
             <div class="modal-actions">
                 <button id="confirm-delete-cancel">Cancel</button>
-                <button id="confirm-delete-all" class="button-danger">Delete All</button>
-                <button id="confirm-delete-all-close" class="button-danger">Delete All & Close</button>
+                <button id="confirm-delete-note" class="button-danger">Delete</button>
             </div>
         </div>
     </div>
@@ -144,6 +264,21 @@ DEFAULT_HTML = """
                         Open links in a new tab
                     </label>
                 </div>
+                <div class="form-group">
+                    <label>
+                        <input type="checkbox" id="most-used-checkbox" name="showMostUsed">
+                        Show your most used links at the top
+                    </label>
+                </div>
+                <hr>
+                <div class="form-group">
+                    <label for="import-file-input">Import Bookmarks (browser HTML or JSON export)</label>
+                    <div class="import-row">
+                        <input type="file" id="import-file-input" accept=".html,.htm,.json">
+                        <button type="button" id="import-button">Import</button>
+                    </div>
+                    <span id="import-status"></span>
+                </div>
                 <hr>
                 <div class="form-group">
                     <label>
@@ -225,6 +360,15 @@ header h1 { margin: 0; font-size: 1.8rem; flex-shrink: 0; white-space: nowrap; }
 .hidden { display: none !important; }
 .search-hidden { display: none !important; }
 
+#widgets-container { display: flex; flex-wrap: wrap; gap: 1rem; margin-bottom: 1rem; }
+#widgets-container:empty { display: none; }
+.widget { flex: 1 1 200px; background-color: #1c1c1c; padding: 0.75rem 1rem; border-radius: 8px; font-size: 0.9rem; }
+.widget h3 { margin: 0 0 0.5rem 0; font-size: 0.85rem; color: #00aaff; text-transform: uppercase; letter-spacing: 0.05em; }
+.widget ul { margin: 0.25rem 0 0.5rem 0; padding-left: 1.2rem; }
+.widget a { color: #8ab4f8; text-decoration: none; }
+.widget a:hover { text-decoration: underline; }
+.widget-error { color: #ffc107; }
+
 .section {
     margin-bottom: 2rem;
     background-color: #1c1c1c;
@@ -233,6 +377,12 @@ header h1 { margin: 0; font-size: 1.8rem; flex-shrink: 0; white-space: nowrap; }
     border: 1px solid transparent;
 }
 .section h2 { color: #00aaff; border-bottom: 1px solid #444; padding-bottom: 0.5rem; margin-bottom: 1rem; }
+.section-toggle { cursor: pointer; user-select: none; }
+.section-toggle::before { content: '▾'; display: inline-block; width: 1.2em; }
+.section-count { margin-left: 0.5rem; font-size: 0.8rem; font-weight: normal; color: #888; }
+.section.collapsed h2 { border-bottom: none; padding-bottom: 0; margin-bottom: 0; }
+.section.collapsed .section-toggle::before { content: '▸'; }
+.section.collapsed .links { display: none; }
 .links {
     list-style: none;
     padding: 0;
@@ -243,6 +393,10 @@ header h1 { margin: 0; font-size: 1.8rem; flex-shrink: 0; white-space: nowrap; }
 }
 .links a { color: #8ab4f8; text-decoration: none; font-size: 1.1em; }
 .links a:hover { text-decoration: underline; }
+.links a[data-status]::after { content: ''; display: inline-block; width: 0.5em; height: 0.5em; margin-left: 0.4em; border-radius: 50%; vertical-align: middle; background-color: #28a745; }
+.links a[data-status="0"]::after { background-color: #dc3545; }
+.links a[data-status="2"]::after { background-color: #ff9800; }
+.links a[data-status="3"]::after { background-color: #6c757d; }
 
 /* Edit Mode Styles */
 .edit-mode .section { border: 1px dashed #555; }
@@ -276,8 +430,17 @@ header h1 { margin: 0; font-size: 1.8rem; flex-shrink: 0; white-space: nowrap; }
 .modal-actions button#save-settings-button, .modal-actions button#save-add-link-button, .modal-actions button#save-notepad-button { background-color: #007bff; }
 hr { border: 1px solid #444; margin: 1.5rem 0;}
 .warning-text { color: #ffc107; }
+.import-row { display: flex; gap: 0.5rem; align-items: center; }
+.import-row input[type="file"] { flex-grow: 1; color: #eee; }
+.import-row button { background-color: #6c757d; color: white; border: none; padding: 0.4rem 1rem; border-radius: 5px; cursor: pointer; }
+#import-status { display: block; margin-top: 0.5rem; font-size: 0.9rem; color: #aaa; }
 
 /* Scratchpad Styles */
+.notepad-toolbar { display: flex; gap: 0.5rem; margin-bottom: 0.5rem; }
+.notepad-toolbar select, .notepad-toolbar input { background-color: #333; border: 1px solid #555; color: #eee; padding: 0.4rem; border-radius: 4px; }
+.notepad-toolbar input { flex-grow: 1; }
+.notepad-toolbar button { background-color: #6c757d; color: white; border: none; padding: 0.4rem 1rem; border-radius: 5px; cursor: pointer; }
+#note-status { display: block; margin-top: 0.25rem; font-size: 0.85rem; color: #aaa; min-height: 1.2em; }
 #notepad-textarea {
     width: 100%;
     height: 60vh;
@@ -340,6 +503,14 @@ document.addEventListener('DOMContentLoaded', () => {
     let currentSettings = {};
     let sortableInstances = [];
     let currentNotepadContent = '';
+    let clickScores = {};
+    let linkStatuses = {};
+    const MOST_USED_LIMIT = 8;
+
+    // --- Profile ---
+    // Pages served under /p/<name>/ read and write that profile's data.
+    const pathParts = window.location.pathname.split('/');
+    const apiBase = pathParts[1] === 'p' && pathParts[2] ? `/api/p/${pathParts[2]}` : '/api';
 
     // --- DOM Elements ---
     const root = document.documentElement;
@@ -352,6 +523,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const linksContainer = document.getElementById('links-container');
     const settingsButton = document.getElementById('settings-button');
     const statusIndicatorContainer = document.getElementById('status-indicator-container');
+    const widgetsContainer = document.getElementById('widgets-container');
 
     // Notepad Modal
     const notepadButton = document.getElementById('notepad-button');
@@ -359,13 +531,16 @@ document.addEventListener('DOMContentLoaded', () => {
     const notepadTextarea = document.getElementById('notepad-textarea');
     const saveNotepadButton = document.getElementById('save-notepad-button');
     const discardNotepadButton = document.getElementById('discard-notepad-button');
-    const deleteAllNotesButton = document.getElementById('delete-all-notes-button');
+    const deleteNoteButton = document.getElementById('delete-note-button');
+    const noteSelect = document.getElementById('note-select');
+    const noteTitleInput = document.getElementById('note-title-input');
+    const newNoteButton = document.getElementById('new-note-button');
+    const noteStatus = document.getElementById('note-status');
 
     // Delete Confirm Modal
     const deleteConfirmModal = document.getElementById('delete-confirm-modal');
     const confirmDeleteCancelButton = document.getElementById('confirm-delete-cancel');
-    const confirmDeleteAllButton = document.getElementById('confirm-delete-all');
-    const confirmDeleteAllCloseButton = document.getElementById('confirm-delete-all-close');
+    const confirmDeleteNoteButton = document.getElementById('confirm-delete-note');
 
 
     // Settings Modal
@@ -374,8 +549,12 @@ document.addEventListener('DOMContentLoaded', () => {
     const cancelSettingsButton = document.getElementById('cancel-settings-button');
     const pageTitleInput = document.getElementById('page-title-input');
     const newTabCheckbox = document.getElementById('new-tab-checkbox');
+    const mostUsedCheckbox = document.getElementById('most-used-checkbox');
     const linkColumnsInput = document.getElementById('link-columns-input');
     const overwriteStaticCheckbox = document.getElementById('overwrite-static-checkbox');
+    const importFileInput = document.getElementById('import-file-input');
+    const importButton = document.getElementById('import-button');
+    const importStatus = document.getElementById('import-status');
 
     // Add Link Modal
     const addLinkModal = document.getElementById('add-link-modal');
@@ -389,16 +568,110 @@ document.addEventListener('DOMContentLoaded', () => {
     const saveAddLinkButton = document.getElementById('save-add-link-button');
     const cancelAddLinkButton = document.getElementById('cancel-add-link-button');
 
+    // --- Revisions ---
+    // Every document comes with its revision as the ETag. Saves send it back in If-Match,
+    // so a write based on stale data gets a 409 with the newer document instead of overwriting it.
+    const revisions = {};
+    // Reads tag the revision with a digest of the file (`"3-1a2b..."`); writes return just `"3"`.
+    const isRevision = (tag, revision) => Boolean(tag) && tag.replace(/"/g, '').split('-')[0] === String(revision);
+
+    // Notes are documents named `note:<id>`, served from /notes/<id>.
+    const documentUrl = (doc) => doc.startsWith('note:') ? `${apiBase}/notes/${encodeURIComponent(doc.slice(5))}` : `${apiBase}/${doc}`;
+
+    // Pass `{ cache: 'no-store' }` to skip the service worker's cached copy and get the server's.
+    const fetchDocument = async (doc, options = {}) => {
+        const response = await fetch(documentUrl(doc), options);
+        if (!response.ok) throw new Error('Network response was not ok');
+        revisions[doc] = response.headers.get('ETag');
+        return response.json();
+    };
+
+    // Large request bodies are gzipped before upload where the browser supports it.
+    const encodeBody = async (text, headers) => {
+        if (text.length < 65536 || typeof CompressionStream === 'undefined') return text;
+        headers['Content-Encoding'] = 'gzip';
+        return new Response(new Blob([text]).stream().pipeThrough(new CompressionStream('gzip'))).blob();
+    };
+
+    // Saves a document. On a conflict, `merge` is called with the server's current data and
+    // returns what to save instead, or null to give up. Resolves to the data that was saved, or
+    // to null when the save was abandoned (the server's data is then in `conflictData`).
+    let conflictData = null;
+    const saveDocument = async (doc, data, merge) => {
+        for (let attempt = 0; attempt < 3; attempt++) {
+            const headers = { 'Content-Type': 'application/json' };
+            if (revisions[doc]) headers['If-Match'] = revisions[doc];
+            const body = await encodeBody(JSON.stringify(data), headers);
+            const response = await fetch(documentUrl(doc), { method: 'POST', headers, body });
+            const result = await response.json();
+            revisions[doc] = response.headers.get('ETag') || revisions[doc];
+            if (response.ok) return data;
+            if (response.status !== 409) throw new Error(result.error || `Failed to save ${doc}`);
+            data = merge ? merge(result.data) : null;
+            if (data === null) {
+                conflictData = result.data;
+                return null;
+            }
+        }
+        throw new Error(`Failed to save ${doc}: it keeps changing on another device`);
+    };
+
+    // Runs several reads and writes in one round trip and remembers the resulting revisions.
+    const runBatch = async (operations) => {
+        const response = await fetch(`${apiBase}/batch`, {
+            method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ operations })
+        });
+        const result = await response.json();
+        if (!response.ok) throw new Error(result.error || 'Batch request failed');
+        Object.entries(result.revisions).forEach(([doc, revision]) => { revisions[doc] = `"${revision}"`; });
+        return result.results;
+    };
+
+    // --- Click Tracking ---
+    // Clicks are reported with sendBeacon, which never delays navigation. The server turns them
+    // into scores that fade over time; they rank search results and the Most Used section.
+    const fetchClickScores = async () => {
+        try {
+            const response = await fetch(`${apiBase}/clicks`);
+            clickScores = response.ok ? (await response.json()).scores : {};
+        } catch (error) {
+            clickScores = {};
+        }
+    };
+
+    const recordClick = (url) => {
+        const body = JSON.stringify({ url });
+        if (!navigator.sendBeacon || !navigator.sendBeacon(`${apiBase}/click`, body)) {
+            fetch(`${apiBase}/click`, { method: 'POST', body, keepalive: true }).catch(() => {});
+        }
+        clickScores[url] = (clickScores[url] || 0) + 1;
+    };
+
+    const handleLinkClick = (event) => {
+        const anchor = event.target.closest('a');
+        if (isEditMode || !anchor || event.button > 1) return;
+        recordClick(anchor.getAttribute('href'));
+    };
+
     // --- Data Fetching ---
     const fetchAllData = async () => {
         try {
-            const [linksResponse, settingsResponse] = await Promise.all([
-                fetch('/api/links'),
-                fetch('/api/settings')
-            ]);
-            if (!linksResponse.ok || !settingsResponse.ok) throw new Error('Network response was not ok');
-            currentLinks = await linksResponse.json();
-            currentSettings = await settingsResponse.json();
+            const scoresLoaded = fetchClickScores();
+            const snapshot = document.getElementById('snapshot-data');
+            if (snapshot) {
+                // Static snapshot pages carry their links and settings, so nothing has to be fetched.
+                const data = JSON.parse(snapshot.textContent);
+                [currentLinks, currentSettings] = [data.links, data.settings];
+                Object.entries(data.revisions).forEach(([doc, revision]) => { revisions[doc] = `"${revision}"`; });
+            } else if (navigator.serviceWorker && navigator.serviceWorker.controller) {
+                // The service worker answers these from its cache without a round trip.
+                [currentLinks, currentSettings] = await Promise.all([fetchDocument('links'), fetchDocument('settings')]);
+            } else {
+                // Only the section listing; the links of each section are fetched as it comes into view.
+                const results = await runBatch([{ op: 'get', resource: 'sections' }, { op: 'get', resource: 'settings' }]);
+                [currentLinks, currentSettings] = results.map(result => result.data);
+            }
+            await scoresLoaded;
 
             applySettings();
             renderLinks();
@@ -408,49 +681,165 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
-    const fetchUptimeKumaStatus = async () => {
-        try {
-            const response = await fetch('/api/uptime-kuma-status');
-            const data = await response.json();
+    const renderStatusIndicator = (data) => {
+        if (!data.enabled) {
+            statusIndicatorContainer.innerHTML = '';
+            return;
+        }
 
-            if (!data.enabled) {
-                statusIndicatorContainer.innerHTML = '';
-                return;
-            }
+        let indicator;
+        if (data.url) {
+            indicator = document.createElement('a');
+            indicator.href = data.url;
+            indicator.target = '_blank';
+            indicator.rel = 'noopener noreferrer';
+        } else {
+            indicator = document.createElement('div');
+        }
+
+        indicator.id = 'status-indicator';
+        
+        if (data.status === 'ok') {
+            indicator.className = 'ok';
+            indicator.title = 'All services are online.';
+            indicator.textContent = 'All Systems Online';
+        } else if (data.status === 'investigate') {
+            indicator.className = 'investigate';
+            indicator.title = 'One or more services requires attention.';
+            indicator.textContent = 'Investigate Services';
+        } else { // Handles 'error' state
+            indicator.className = 'error';
+            const errorMessage = data.message || 'Could not retrieve status.';
+            indicator.title = errorMessage;
+            indicator.textContent = 'Status Unavailable';
+        }
+        // With several Uptime Kuma instances, list each one's status in the tooltip.
+        if ((data.instances || []).length > 1) {
+            indicator.title += '\\n' + data.instances.map(instance => `${instance.url} (${instance.slug}): ${instance.status}`).join('\\n');
+        }
+        
+        statusIndicatorContainer.innerHTML = ''; // Clear previous indicator
+        statusIndicatorContainer.appendChild(indicator);
+    };
+
+    // --- Widgets ---
+    // All widget data arrives in one batched request. The server refreshes each widget on its
+    // own interval and shares the result, so open tabs add no load on the data sources.
+    let widgetTimer = null;
+    const scheduleWidgetRefresh = (seconds) => {
+        clearTimeout(widgetTimer);
+        widgetTimer = setTimeout(fetchWidgets, Math.max(seconds || 60, 5) * 1000);
+    };
+
+    const isWebLink = (url) => /^https?:/i.test(url || '');
+
+    const widgetRenderers = {
+        host: (data, body) => {
+            body.textContent = `CPU ${data.cpuPercent}% · Load ${data.load[0]} · Memory ${data.memoryPercent}% · Disk ${data.diskPercent}%`;
+        },
+        docker: (data, body) => {
+            body.textContent = Object.entries(data.states).map(([state, count]) => `${count} ${state}`).join(' · ') || 'No containers';
+            body.title = data.containers.map(container => `${container.name}: ${container.status}`).join('\\n');
+        },
+        rss: (data, body) => {
+            data.feeds.forEach(feed => {
+                const heading = document.createElement('strong');
+                heading.textContent = feed.title || feed.url;
+                body.appendChild(heading);
+                const list = document.createElement('ul');
+                if (feed.error) {
+                    const li = document.createElement('li');
+                    li.textContent = `Unavailable: ${feed.error}`;
+                    list.appendChild(li);
+                }
+                (feed.items || []).forEach(item => {
+                    const li = document.createElement('li');
+                    const anchor = document.createElement(isWebLink(item.link) ? 'a' : 'span');
+                    if (isWebLink(item.link)) {
+                        anchor.href = item.link;
+                        anchor.target = '_blank';
+                        anchor.rel = 'noopener noreferrer';
+                    }
+                    anchor.textContent = item.title || item.link;
+                    li.appendChild(anchor);
+                    list.appendChild(li);
+                });
+                body.appendChild(list);
+            });
+        },
+    };
 
-            let indicator;
-            if (data.url) {
-                indicator = document.createElement('a');
-                indicator.href = data.url;
-                indicator.target = '_blank';
-                indicator.rel = 'noopener noreferrer';
+    const renderWidgets = (widgets) => {
+        widgetsContainer.innerHTML = '';
+        Object.entries(widgets).forEach(([name, result]) => {
+            const render = widgetRenderers[name];
+            if (!render || result.pending) return;
+            const widgetDiv = document.createElement('div');
+            widgetDiv.className = 'widget';
+            const title = document.createElement('h3');
+            title.textContent = result.title;
+            const body = document.createElement('div');
+            body.className = 'widget-body';
+            if (result.error) {
+                body.classList.add('widget-error');
+                body.textContent = `Unavailable: ${result.error}`;
             } else {
-                indicator = document.createElement('div');
+                render(result.data, body);
             }
+            widgetDiv.appendChild(title);
+            widgetDiv.appendChild(body);
+            widgetsContainer.appendChild(widgetDiv);
+        });
+    };
 
-            indicator.id = 'status-indicator';
-            
-            if (data.status === 'ok') {
-                indicator.className = 'ok';
-                indicator.title = 'All services are online.';
-                indicator.textContent = 'All Systems Online';
-            } else if (data.status === 'investigate') {
-                indicator.className = 'investigate';
-                indicator.title = 'One or more services requires attention.';
-                indicator.textContent = 'Investigate Services';
-            } else { // Handles 'error' state
-                indicator.className = 'error';
-                const errorMessage = data.message || 'Could not retrieve status.';
-                indicator.title = errorMessage;
-                indicator.textContent = 'Status Unavailable';
-            }
-            
-            statusIndicatorContainer.innerHTML = ''; // Clear previous indicator
-            statusIndicatorContainer.appendChild(indicator);
+    // --- Link Status ---
+    // Links watched by an Uptime Kuma monitor get a dot with that monitor's status. The server
+    // sends only {url: status}; each poll touches just the links whose status changed.
+    const LINK_STATUS_LABELS = { 0: 'Down', 1: 'Up', 2: 'Pending', 3: 'Maintenance' };
+
+    const setLinkStatus = (anchor, status) => {
+        if (status === undefined) {
+            delete anchor.dataset.status;
+            anchor.removeAttribute('title');
+        } else {
+            anchor.dataset.status = status;
+            anchor.title = `Status: ${LINK_STATUS_LABELS[status] || status}`;
+        }
+    };
+
+    const fetchLinkStatuses = async () => {
+        try {
+            const response = await fetch(`${apiBase}/link-status`);
+            if (!response.ok) return;
+            linkStatuses = (await response.json()).statuses || {};
+        } catch (error) {
+            console.error('Error fetching link status:', error);
+            return;
+        }
+        linksContainer.querySelectorAll('.links a').forEach(anchor => {
+            const status = linkStatuses[anchor.getAttribute('href')];
+            if (anchor.dataset.status !== (status === undefined ? undefined : String(status))) setLinkStatus(anchor, status);
+        });
+    };
 
+    const fetchWidgets = async () => {
+        try {
+            const response = await fetch('/api/widgets');
+            const result = await response.json();
+            const widgets = result.widgets || {};
+            const kuma = widgets['uptime-kuma'];
+            if (!kuma) {
+                renderStatusIndicator({ enabled: false });
+            } else if (!kuma.pending) {
+                renderStatusIndicator(kuma.data || { enabled: true, status: 'error', message: kuma.error });
+                fetchLinkStatuses();
+            }
+            renderWidgets(widgets);
+            scheduleWidgetRefresh(result.interval);
         } catch (error) {
-            console.error('Error fetching Uptime Kuma status:', error);
+            console.error('Error fetching widgets:', error);
             statusIndicatorContainer.innerHTML = `<div id="status-indicator" class="error" title="Client-side error fetching status.">Status Unavailable</div>`;
+            scheduleWidgetRefresh();
         }
     };
 
@@ -461,57 +850,193 @@ document.addEventListener('DOMContentLoaded', () => {
         root.style.setProperty('--link-columns', currentSettings.linkColumns || 2);
     };
 
+    const createLinkAnchor = (link, linkTarget) => {
+        const linkAnchor = document.createElement('a');
+        linkAnchor.href = link.url;
+        linkAnchor.target = linkTarget;
+        linkAnchor.textContent = link.name;
+        linkAnchor.setAttribute('data-name', link.name.toLowerCase());
+        linkAnchor.setAttribute('data-url', link.url.toLowerCase());
+        if (linkStatuses[link.url] !== undefined) setLinkStatus(linkAnchor, linkStatuses[link.url]);
+        return linkAnchor;
+    };
+
+    // --- Sections ---
+    // Without the service worker's cache, only section titles and link counts are loaded up front.
+    // A section's links are fetched when it scrolls into view, and collapsed sections load nothing
+    // until expanded. Editing, searching, adding links and Most Used load all remaining links first.
+    const sectionLoads = new Map();
+    const hasAllLinks = () => (currentLinks.sections || []).every(section => Array.isArray(section.links));
+    const isCollapsed = (section) => (currentSettings.collapsedSections || []).includes(section.title);
+
+    const ensureAllLinks = async () => {
+        if (!hasAllLinks()) currentLinks = await fetchDocument('links');
+    };
+
+    const reloadSections = async () => {
+        const response = await fetch(`${apiBase}/links/sections`);
+        if (!response.ok) throw new Error('Failed to load sections');
+        revisions.links = response.headers.get('ETag');
+        currentLinks = await response.json();
+        renderLinks();
+        handleSearch();
+    };
+
+    // Resolves to the section's links, or null when the links changed and were reloaded instead.
+    const fetchSectionLinks = (section, index) => {
+        if (!sectionLoads.has(section)) {
+            const headers = revisions.links ? { 'If-Match': revisions.links } : {};
+            sectionLoads.set(section, fetch(`${apiBase}/links/sections/${index}`, { headers }).then(async (response) => {
+                if (response.status === 412) {
+                    await reloadSections();
+                    return null;
+                }
+                if (!response.ok) throw new Error(`Failed to load section (${response.status})`);
+                return (await response.json()).links;
+            }).finally(() => sectionLoads.delete(section)));
+        }
+        return sectionLoads.get(section);
+    };
+
+    const appendLinkItems = (linksUl, links, linkTarget) => {
+        links.forEach(link => {
+            const li = document.createElement('li');
+            li.className = 'link-item';
+            li.appendChild(createLinkAnchor(link, linkTarget));
+            linksUl.appendChild(li);
+        });
+    };
+
+    const fillSection = async (linksUl) => {
+        if (sectionObserver) sectionObserver.unobserve(linksUl);
+        const index = parseInt(linksUl.dataset.sectionIndex, 10);
+        const section = (currentLinks.sections || [])[index];
+        if (!section) return;
+        try {
+            if (!Array.isArray(section.links)) {
+                const links = await fetchSectionLinks(section, index);
+                if (links === null || currentLinks.sections[index] !== section) return;
+                section.links = links;
+            }
+            linksUl.style.minHeight = '';
+            appendLinkItems(linksUl, section.links, currentSettings.openLinksInNewTab ? '_blank' : '_self');
+        } catch (error) {
+            console.error('Error loading section:', error);
+        }
+    };
+
+    const sectionObserver = typeof IntersectionObserver === 'undefined' ? null : new IntersectionObserver((entries) => {
+        entries.forEach(entry => { if (entry.isIntersecting) fillSection(entry.target); });
+    }, { rootMargin: '300px' });
+
+    const toggleSectionCollapsed = async (title) => {
+        const collapse = !(currentSettings.collapsedSections || []).includes(title);
+        const applyToggle = (settings) => {
+            const titles = (settings.collapsedSections || []).filter(t => t !== title);
+            return { ...settings, collapsedSections: collapse ? [...titles, title] : titles };
+        };
+        currentSettings = applyToggle(currentSettings);
+        renderLinks();
+        handleSearch();
+        try {
+            currentSettings = await saveDocument('settings', currentSettings, applyToggle);
+        } catch (error) {
+            console.error('Error saving collapsed sections:', error);
+        }
+    };
+
+    // The highest-scoring links across all sections, each URL listed once.
+    const renderMostUsed = (linkTarget) => {
+        if (!hasAllLinks()) {
+            ensureAllLinks().then(() => { renderLinks(); handleSearch(); }).catch(error => console.error('Error loading links:', error));
+            return;
+        }
+        const seen = new Set();
+        const ranked = (currentLinks.sections || [])
+            .flatMap(section => section.links || [])
+            .filter(link => clickScores[link.url] > 0 && !seen.has(link.url) && seen.add(link.url))
+            .sort((a, b) => clickScores[b.url] - clickScores[a.url])
+            .slice(0, MOST_USED_LIMIT);
+        if (!ranked.length) return;
+        const sectionDiv = document.createElement('div');
+        sectionDiv.className = 'section most-used-section';
+        sectionDiv.innerHTML = '<h2>Most Used</h2>';
+        const linksUl = document.createElement('ul');
+        linksUl.className = 'links';
+        appendLinkItems(linksUl, ranked, linkTarget);
+        sectionDiv.appendChild(linksUl);
+        linksContainer.appendChild(sectionDiv);
+    };
+
+    // Outside edit mode and search, section bodies are filled in by `fillSection` once visible.
     const renderLinks = () => {
+        if (sectionObserver) sectionObserver.disconnect();
         linksContainer.innerHTML = '';
         const linkTarget = currentSettings.openLinksInNewTab ? '_blank' : '_self';
+        const searching = searchInput.value !== '';
+        if (!isEditMode && currentSettings.showMostUsed) renderMostUsed(linkTarget);
 
-        (currentLinks.sections || []).forEach((section) => {
+        (currentLinks.sections || []).forEach((section, sectionIndex) => {
             const sectionDiv = document.createElement('div');
             sectionDiv.className = 'section';
+            const count = Array.isArray(section.links) ? section.links.length : section.count;
 
-            let sectionHeader;
+            // Titles and names may come from imported files: they are only ever set as text or values.
             if (isEditMode) {
-                sectionHeader = `
+                sectionDiv.innerHTML = `
                     <div class="section-header">
                         <div class="section-header-title">
                            <span class="drag-handle section-drag-handle">☰</span>
-                           <input type="text" value="${section.title}" class="section-title-input">
+                           <input type="text" class="section-title-input">
                         </div>
                         <button class="remove-btn remove-section-btn">X</button>
                     </div>`;
+                sectionDiv.querySelector('.section-title-input').value = section.title;
             } else {
-                sectionHeader = `<h2>${section.title}</h2>`;
+                const heading = document.createElement('h2');
+                heading.className = 'section-toggle';
+                heading.textContent = section.title;
+                const countSpan = document.createElement('span');
+                countSpan.className = 'section-count';
+                countSpan.textContent = count;
+                heading.appendChild(countSpan);
+                sectionDiv.appendChild(heading);
             }
-            sectionDiv.innerHTML = sectionHeader;
 
 
             const linksUl = document.createElement('ul');
             linksUl.className = 'links';
+            linksUl.dataset.sectionIndex = sectionIndex;
+            sectionDiv.dataset.sectionIndex = sectionIndex;
             sectionDiv.appendChild(linksUl);
 
-            (section.links || []).forEach((link) => {
-                const li = document.createElement('li');
-                li.className = 'link-item';
-                if (isEditMode) {
+            if (isEditMode) {
+                (section.links || []).forEach((link) => {
+                    const li = document.createElement('li');
+                    li.className = 'link-item';
                     li.innerHTML = `
                         <span class="drag-handle link-drag-handle">☰</span>
                         <div class="link-item-content">
-                            <input type="text" placeholder="Name" value="${link.name}" class="link-name-input">
-                            <input type="text" placeholder="URL" value="${link.url}" class="link-url-input">
+                            <input type="text" placeholder="Name" class="link-name-input">
+                            <input type="text" placeholder="URL" class="link-url-input">
                         </div>
                         <button class="remove-btn remove-link-btn">X</button>
                     `;
-                } else {
-                    const linkAnchor = document.createElement('a');
-                    linkAnchor.href = link.url;
-                    linkAnchor.target = linkTarget;
-                    linkAnchor.textContent = link.name;
-                    linkAnchor.setAttribute('data-name', link.name.toLowerCase());
-                    linkAnchor.setAttribute('data-url', link.url.toLowerCase());
-                    li.appendChild(linkAnchor);
-                }
-                linksUl.appendChild(li);
-            });
+                    li.querySelector('.link-name-input').value = link.name;
+                    li.querySelector('.link-url-input').value = link.url;
+                    linksUl.appendChild(li);
+                });
+            } else if (searching) {
+                appendLinkItems(linksUl, section.links || [], linkTarget);
+            } else if (isCollapsed(section)) {
+                sectionDiv.classList.add('collapsed');
+            } else if (sectionObserver) {
+                // Reserve roughly the final height so the sections below don't jump as this one fills in.
+                linksUl.style.minHeight = `${Math.ceil(count / (currentSettings.linkColumns || 2)) * 2.5}rem`;
+                sectionObserver.observe(linksUl);
+            } else {
+                fillSection(linksUl);
+            }
 
             if(isEditMode) {
                 const addLinkBtn = document.createElement('button');
@@ -531,11 +1056,22 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     // --- Search Logic ---
+    // While searching, the matches in each section are ordered by click score.
+    let renderedForSearch = false;
     const handleSearch = () => {
         const searchTerm = searchInput.value.toLowerCase();
+        if (searchTerm && !hasAllLinks()) {
+            ensureAllLinks().then(handleSearch).catch(error => console.error('Error loading links:', error));
+            return;
+        }
+        // Searching shows every section, collapsed or not; clearing the search restores them.
+        if (!isEditMode && Boolean(searchTerm) !== renderedForSearch) {
+            renderedForSearch = Boolean(searchTerm);
+            renderLinks();
+        }
 
         document.querySelectorAll('.section').forEach(section => {
-            let sectionHasVisibleLink = false;
+            const matches = [];
             section.querySelectorAll('.link-item').forEach(item => {
                 const link = item.querySelector('a');
                 if (link) {
@@ -543,10 +1079,14 @@ document.addEventListener('DOMContentLoaded', () => {
                     const url = link.getAttribute('data-url');
                     const isVisible = name.includes(searchTerm) || url.includes(searchTerm);
                     item.classList.toggle('search-hidden', !isVisible);
-                    if (isVisible) sectionHasVisibleLink = true;
+                    item.style.order = '';
+                    if (isVisible) matches.push([clickScores[link.getAttribute('href')] || 0, item]);
                 }
             });
-            section.classList.toggle('search-hidden', !sectionHasVisibleLink);
+            if (searchTerm) {
+                matches.sort((a, b) => b[0] - a[0]).forEach(([, item], rank) => { item.style.order = rank; });
+            }
+            section.classList.toggle('search-hidden', Boolean(searchTerm) && matches.length === 0);
         });
     };
 
@@ -569,7 +1109,15 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     // --- Edit Mode Logic ---
-    const toggleEditMode = () => {
+    const toggleEditMode = async () => {
+        if (!isEditMode && !hasAllLinks()) {
+            try {
+                await ensureAllLinks();
+            } catch (error) {
+                console.error('Error loading links:', error);
+                return;
+            }
+        }
         isEditMode = !isEditMode;
         document.body.classList.toggle('edit-mode', isEditMode);
 
@@ -597,11 +1145,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const saveAllLinkChanges = async (newLinkData) => {
         try {
-            const response = await fetch('/api/links', {
-                method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(newLinkData)
-            });
-            if (!response.ok) throw new Error('Failed to save link changes');
-            currentLinks = newLinkData;
+            const saved = await saveDocument('links', newLinkData, () =>
+                confirm('Links were changed on another device. Overwrite them with your version?') ? newLinkData : null);
+            currentLinks = saved || conflictData;
             toggleEditMode(); // Exit edit mode and re-render
         } catch (error) {
             console.error('Error saving links:', error);
@@ -630,8 +1176,10 @@ document.addEventListener('DOMContentLoaded', () => {
     const openSettingsModal = () => {
         pageTitleInput.value = currentSettings.pageTitle || 'My Homepage';
         newTabCheckbox.checked = currentSettings.openLinksInNewTab;
+        mostUsedCheckbox.checked = currentSettings.showMostUsed || false;
         linkColumnsInput.value = currentSettings.linkColumns || 2;
         overwriteStaticCheckbox.checked = currentSettings.forceOverwriteStaticFiles || false;
+        importStatus.textContent = '';
         settingsModal.classList.add('visible');
     };
 
@@ -639,17 +1187,24 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const saveSettingsChanges = async () => {
         const newSettings = {
+            ...currentSettings,
             pageTitle: pageTitleInput.value,
             openLinksInNewTab: newTabCheckbox.checked,
             linkColumns: parseInt(linkColumnsInput.value, 10),
+            showMostUsed: mostUsedCheckbox.checked,
             forceOverwriteStaticFiles: overwriteStaticCheckbox.checked
         };
-        try {
-            const response = await fetch('/api/settings', {
-                method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(newSettings)
+        const baseSettings = currentSettings;
+        // Keep settings changed on another device unless this form changed the same field.
+        const mergeSettings = (theirs) => {
+            const merged = { ...theirs };
+            Object.keys(newSettings).forEach(key => {
+                if (newSettings[key] !== baseSettings[key]) merged[key] = newSettings[key];
             });
-            if (!response.ok) throw new Error('Failed to save settings');
-            currentSettings = newSettings;
+            return merged;
+        };
+        try {
+            currentSettings = await saveDocument('settings', newSettings, mergeSettings);
             applySettings();
             renderLinks();
             closeSettingsModal();
@@ -658,14 +1213,133 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    const importBookmarks = async () => {
+        const file = importFileInput.files[0];
+        if (!file) return;
+        importButton.disabled = true;
+        importStatus.textContent = 'Importing...';
+        try {
+            const headers = {};
+            if (revisions.links) headers['If-Match'] = revisions.links;
+            const response = await fetch(`${apiBase}/import`, { method: 'POST', headers, body: file });
+            const result = await response.json();
+            revisions.links = response.headers.get('ETag') || revisions.links;
+            if (response.status === 409) throw new Error('links were changed on another device, please try again');
+            if (!response.ok) throw new Error(result.error || 'Import failed');
+            currentLinks = await fetchDocument('links');
+            renderLinks();
+            importStatus.textContent = `Imported ${result.imported} links into ${result.sections} sections (${result.duplicates} duplicates and ${result.invalid} invalid URLs skipped).`;
+            importFileInput.value = '';
+        } catch (error) {
+            importStatus.textContent = `Import failed: ${error.message}`;
+        } finally {
+            importButton.disabled = false;
+        }
+    };
+
     // --- Scratchpad Modal Logic ---
+    // The notes listing only holds titles and sizes. A note's text is fetched when it is opened,
+    // NOTE_PAGE_SIZE characters at a time: later pages load as the textarea is scrolled, and a
+    // note can be edited once all of it is loaded.
+    const NOTE_PAGE_SIZE = 262144;
+    const LEGACY_NOTE_ID = 'scratchpad';
+    let noteList = [];
+    let currentNoteId = null;
+    let currentNoteTitle = '';
+    let currentNoteTotal = 0;
+    let notePageLoading = null;
+
+    const newNoteId = () => `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 8)}`;
+    const formatNoteSize = (size) => size < 1024 ? `${size} chars` : `${Math.round(size / 1024)}K chars`;
+    const isNotePartial = () => currentNotepadContent.length < currentNoteTotal;
+    const isNoteDirty = () => notepadTextarea.value !== currentNotepadContent || noteTitleInput.value !== currentNoteTitle;
+
+    const renderNoteSelect = () => {
+        const notes = noteList.some(note => note.id === currentNoteId)
+            ? noteList : [...noteList, { id: currentNoteId, title: `${currentNoteTitle} (new)`, size: 0 }];
+        noteSelect.innerHTML = '';
+        notes.forEach(note => {
+            const option = document.createElement('option');
+            option.value = note.id;
+            option.textContent = `${note.title} (${formatNoteSize(note.size)})`;
+            noteSelect.appendChild(option);
+        });
+        noteSelect.value = currentNoteId;
+    };
+
+    const fetchNoteList = async () => {
+        const response = await fetch(`${apiBase}/notes?content=false`);
+        if (!response.ok) throw new Error('Failed to load notes');
+        noteList = (await response.json()).notes || [];
+    };
+
+    const updateNoteStatus = () => {
+        notepadTextarea.readOnly = isNotePartial();
+        noteStatus.textContent = isNotePartial()
+            ? `Showing ${formatNoteSize(currentNotepadContent.length)} of ${formatNoteSize(currentNoteTotal)}. Scroll down to load more; the note can be edited once it is fully loaded.`
+            : '';
+    };
+
+    // Later pages send the revision of the first one, so a note that changes mid-way fails with 412.
+    const fetchNotePage = async (id, offset) => {
+        const doc = `note:${id}`;
+        const headers = offset > 0 && revisions[doc] ? { 'If-Match': revisions[doc] } : {};
+        const response = await fetch(`${documentUrl(doc)}?offset=${offset}&limit=${NOTE_PAGE_SIZE}`, { headers });
+        if (!response.ok) throw Object.assign(new Error(`Failed to load note (${response.status})`), { status: response.status });
+        if (offset === 0) revisions[doc] = response.headers.get('ETag');
+        return response.json();
+    };
+
+    const openNote = async (id, newTitle = 'Untitled') => {
+        currentNoteId = id;
+        notePageLoading = null;
+        if (noteList.some(note => note.id === id)) {
+            const page = await fetchNotePage(id, 0);
+            if (currentNoteId !== id) return;
+            currentNoteTitle = page.title;
+            currentNoteTotal = page.total;
+            currentNotepadContent = page.content;
+        } else {
+            // Not saved yet; If-Match "0" makes the first save fail if the note exists after all.
+            revisions[`note:${id}`] = '"0"';
+            currentNoteTitle = newTitle;
+            currentNoteTotal = 0;
+            currentNotepadContent = '';
+        }
+        noteTitleInput.value = currentNoteTitle;
+        notepadTextarea.value = currentNotepadContent;
+        notepadTextarea.scrollTop = 0;
+        renderNoteSelect();
+        updateNoteStatus();
+    };
+
+    const loadNextNotePage = () => {
+        if (notePageLoading || !isNotePartial()) return;
+        const id = currentNoteId;
+        notePageLoading = fetchNotePage(id, currentNotepadContent.length).then(page => {
+            if (currentNoteId !== id) return;
+            const scrollTop = notepadTextarea.scrollTop;
+            currentNotepadContent += page.content;
+            notepadTextarea.value = currentNotepadContent;
+            notepadTextarea.scrollTop = scrollTop;
+            updateNoteStatus();
+        }).catch(error => {
+            // The note changed while it was being paged in; start again from the top.
+            if (error.status === 412) return openNote(id);
+            console.error('Error loading note:', error);
+        }).finally(() => { notePageLoading = null; });
+    };
+
     const openNotepadModal = async () => {
         try {
-            const response = await fetch('/api/notes');
-            if (!response.ok) throw new Error('Failed to fetch notes');
-            const data = await response.json();
-            currentNotepadContent = data.content;
-            notepadTextarea.value = currentNotepadContent;
+            await fetchNoteList();
+            if (noteList.some(note => note.id === currentNoteId)) {
+                await openNote(currentNoteId);
+            } else if (noteList.length) {
+                await openNote(noteList[0].id);
+            } else {
+                await openNote(LEGACY_NOTE_ID, 'Scratchpad');
+            }
             notepadModal.classList.add('visible');
         } catch (error) {
             console.error('Error opening notepad:', error);
@@ -674,15 +1348,36 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const closeNotepadModal = () => notepadModal.classList.remove('visible');
 
-    const saveNotepadChanges = async (content = null, andClose = false) => {
-        const newContent = content !== null ? content : notepadTextarea.value;
+    const switchNote = async (id, newTitle) => {
+        if (isNoteDirty() && !confirm('Discard your unsaved changes to this note?')) {
+            noteSelect.value = currentNoteId;
+            return;
+        }
+        try {
+            await openNote(id, newTitle);
+        } catch (error) {
+            console.error('Error opening note:', error);
+        }
+    };
+
+    const saveNotepadChanges = async (andClose = false) => {
+        if (isNotePartial()) return;
+        const id = currentNoteId;
+        const note = { title: noteTitleInput.value.trim() || 'Untitled', content: notepadTextarea.value };
         try {
-            const response = await fetch('/api/notes', {
-                method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ content: newContent })
-            });
-            if (!response.ok) throw new Error('Failed to save notes');
-            currentNotepadContent = newContent;
-            notepadTextarea.value = newContent;
+            const saved = await saveDocument(`note:${id}`, note, () =>
+                confirm('This note was changed on another device. Overwrite it with your version?') ? note : null);
+            await fetchNoteList();
+            if (!saved) {
+                // Show the newer version instead and leave the modal open.
+                await openNote(id);
+                return;
+            }
+            currentNoteTitle = note.title;
+            currentNoteTotal = note.content.length;
+            currentNotepadContent = note.content;
+            noteTitleInput.value = note.title;
+            renderNoteSelect();
             if (andClose) {
                 closeNotepadModal();
             }
@@ -691,6 +1386,25 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    const deleteCurrentNote = async () => {
+        const doc = `note:${currentNoteId}`;
+        try {
+            if (noteList.some(note => note.id === currentNoteId)) {
+                let response = await fetch(documentUrl(doc), { method: 'DELETE', headers: { 'If-Match': revisions[doc] } });
+                if (response.status === 409) {
+                    if (!confirm('This note was changed on another device. Delete it anyway?')) return;
+                    response = await fetch(documentUrl(doc), { method: 'DELETE' });
+                }
+                if (!response.ok && response.status !== 404) throw new Error('Failed to delete note');
+            }
+            delete revisions[doc];
+            await fetchNoteList();
+            await openNote(noteList.length ? noteList[0].id : LEGACY_NOTE_ID, 'Scratchpad');
+        } catch (error) {
+            console.error('Error deleting note:', error);
+        }
+    };
+
     // --- Add Link Modal Logic ---
     const openAddLinkModal = (url) => {
         addLinkForm.reset();
@@ -719,30 +1433,45 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const closeAddLinkModal = () => addLinkModal.classList.remove('visible');
 
-    const saveLinkFromModal = () => {
+    const saveLinkFromModal = async () => {
         const name = linkNameInput.value.trim();
         const url = linkUrlInput.value.trim();
         const sectionChoice = linkSectionSelect.value;
         const newSectionTitle = newSectionTitleInput.value.trim();
         if (!name || !url) return;
         const newLink = { name, url };
-        let updatedLinks = JSON.parse(JSON.stringify(currentLinks));
-        if (sectionChoice === '--new-section--') {
-            if (!newSectionTitle) return;
-            updatedLinks.sections.push({ title: newSectionTitle, links: [newLink] });
-        } else {
-            updatedLinks.sections[parseInt(sectionChoice, 10)].links.push(newLink);
+        if (sectionChoice === '--new-section--' && !newSectionTitle) return;
+        const targetTitle = sectionChoice === '--new-section--' ? newSectionTitle : currentLinks.sections[parseInt(sectionChoice, 10)].title;
+        // Adds the link to the section with the chosen title, so it can be re-applied on top of newer links.
+        const addLinkTo = (links) => {
+            const updatedLinks = JSON.parse(JSON.stringify(links));
+            const section = updatedLinks.sections.find(s => s.title === targetTitle);
+            if (section) {
+                section.links.push(newLink);
+            } else {
+                updatedLinks.sections.push({ title: targetTitle, links: [newLink] });
+            }
+            return updatedLinks;
+        };
+        try {
+            await ensureAllLinks();
+        } catch (error) {
+            console.error('Error loading links:', error);
+            return;
         }
         // This is a bit abrupt. Instead of calling the full save, let's just update the local data
         // and re-render. This is better UX for drag-drop.
-        currentLinks = updatedLinks;
+        currentLinks = addLinkTo(currentLinks);
         renderLinks();
-        // Now save in the background
-        fetch('/api/links', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(currentLinks)
-        }).catch(err => console.error("Failed to save new link in background:", err));
+        // Now save in the background, replaying the addition if another device saved first
+        saveDocument('links', currentLinks, (theirs) => addLinkTo(theirs))
+            .then((saved) => {
+                if (saved !== currentLinks) {
+                    currentLinks = saved;
+                    renderLinks();
+                }
+            })
+            .catch(err => console.error("Failed to save new link in background:", err));
 
         closeAddLinkModal();
     };
@@ -822,6 +1551,14 @@ document.addEventListener('DOMContentLoaded', () => {
 
     addDynamicEventListeners();
     searchInput.addEventListener('input', handleSearch);
+    linksContainer.addEventListener('click', (event) => {
+        const toggle = event.target.closest('.section-toggle');
+        const sectionDiv = toggle && toggle.closest('.section');
+        if (isEditMode || !sectionDiv || searchInput.value) return;
+        toggleSectionCollapsed(currentLinks.sections[parseInt(sectionDiv.dataset.sectionIndex, 10)].title);
+    });
+    linksContainer.addEventListener('click', handleLinkClick);
+    linksContainer.addEventListener('auxclick', handleLinkClick);
     editButton.addEventListener('click', toggleEditMode);
     saveButton.addEventListener('click', saveLinkChangesFromEditMode);
     discardButton.addEventListener('click', () => {
@@ -830,24 +1567,27 @@ document.addEventListener('DOMContentLoaded', () => {
     settingsButton.addEventListener('click', openSettingsModal);
     cancelSettingsButton.addEventListener('click', closeSettingsModal);
     saveSettingsButton.addEventListener('click', saveSettingsChanges);
+    importButton.addEventListener('click', importBookmarks);
 
     // Notepad Listeners
     notepadButton.addEventListener('click', openNotepadModal);
-    saveNotepadButton.addEventListener('click', () => saveNotepadChanges(null, true));
+    saveNotepadButton.addEventListener('click', () => saveNotepadChanges(true));
     discardNotepadButton.addEventListener('click', () => {
         notepadTextarea.value = currentNotepadContent;
+        noteTitleInput.value = currentNoteTitle;
         closeNotepadModal();
     });
-    deleteAllNotesButton.addEventListener('click', () => deleteConfirmModal.classList.add('visible'));
+    deleteNoteButton.addEventListener('click', () => deleteConfirmModal.classList.add('visible'));
+    noteSelect.addEventListener('change', () => switchNote(noteSelect.value));
+    newNoteButton.addEventListener('click', () => switchNote(newNoteId()));
+    notepadTextarea.addEventListener('scroll', () => {
+        if (notepadTextarea.scrollTop + notepadTextarea.clientHeight >= notepadTextarea.scrollHeight - 200) loadNextNotePage();
+    });
 
     // Delete Confirmation Listeners
     confirmDeleteCancelButton.addEventListener('click', () => deleteConfirmModal.classList.remove('visible'));
-    confirmDeleteAllButton.addEventListener('click', () => {
-        saveNotepadChanges('', false);
-        deleteConfirmModal.classList.remove('visible');
-    });
-    confirmDeleteAllCloseButton.addEventListener('click', () => {
-        saveNotepadChanges('', true);
+    confirmDeleteNoteButton.addEventListener('click', () => {
+        deleteCurrentNote();
         deleteConfirmModal.classList.remove('visible');
     });
 
@@ -890,16 +1630,209 @@ document.addEventListener('DOMContentLoaded', () => {
     cancelAddLinkButton.addEventListener('click', closeAddLinkModal);
     saveAddLinkButton.addEventListener('click', saveLinkFromModal);
 
+    // --- Live Updates ---
+    // Saves made on other devices arrive over a server-sent event stream and are applied in
+    // place. Documents being edited here are left alone; saving them then reports a conflict.
+    const applyRemoteChange = async (doc, change) => {
+        const tag = `"${change.revision}"`;
+        if (isRevision(revisions[doc], change.revision)) return; // Our own save, or already applied
+        try {
+            if (doc === 'links' && !isEditMode) {
+                // A patch lists the new sections, with unchanged ones given by their index in the
+                // revision it is based on; without a usable patch the links are loaded again.
+                const patch = change.patch && isRevision(revisions.links, change.patch.base) ? change.patch : null;
+                const sections = currentLinks.sections || [];
+                if (patch && patch.sections.every(section => typeof section !== 'number' || sections[section])) {
+                    currentLinks = { sections: patch.sections.map(section => typeof section === 'number' ? sections[section] : section) };
+                    revisions.links = tag;
+                } else if (!hasAllLinks()) {
+                    await reloadSections();
+                    return;
+                } else {
+                    // The revision comes from the response: it may be newer than this change.
+                    currentLinks = await fetchDocument('links', { cache: 'no-store' });
+                }
+                renderLinks();
+                handleSearch();
+            } else if (doc === 'settings') {
+                if (change.data) {
+                    currentSettings = change.data;
+                    revisions.settings = tag;
+                } else {
+                    currentSettings = await fetchDocument('settings', { cache: 'no-store' });
+                }
+                applySettings();
+                if (!isEditMode) {
+                    renderLinks();
+                    handleSearch();
+                }
+            } else if (doc === 'notes' && notepadModal.classList.contains('visible')) {
+                await fetchNoteList();
+                renderNoteSelect();
+            } else if (doc === `note:${currentNoteId}` && notepadModal.classList.contains('visible') && !isNoteDirty()) {
+                if (change.revision === null) {
+                    // Deleted on another device: show another note, as after deleting it here.
+                    await fetchNoteList();
+                    await openNote(noteList.length ? noteList[0].id : LEGACY_NOTE_ID, 'Scratchpad');
+                } else {
+                    await openNote(currentNoteId);
+                }
+            }
+        } catch (error) {
+            console.error(`Error applying remote change to ${doc}:`, error);
+        }
+    };
+
+    const subscribeToChanges = () => {
+        if (typeof EventSource === 'undefined') return;
+        const source = new EventSource(`${apiBase}/changes/stream`);
+        source.addEventListener('hello', (event) => {
+            // Catch up on anything saved between the initial load and subscribing.
+            const position = JSON.parse(event.data);
+            ['links', 'settings'].forEach(doc => {
+                if (revisions[doc] && !isRevision(revisions[doc], position.revisions[doc])) {
+                    applyRemoteChange(doc, { revision: position.revisions[doc] });
+                }
+            });
+        });
+        source.addEventListener('change', (event) => {
+            const payload = JSON.parse(event.data);
+            Object.entries(payload.changes).forEach(([doc, change]) => applyRemoteChange(doc, change));
+        });
+    };
+
+    // --- Offline Cache ---
+    // The service worker answers from its cache first and revalidates in the background.
+    // It reports documents that changed on the server, which are then re-rendered.
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/sw.js').catch(err => console.warn('Service worker registration failed:', err));
+        navigator.serviceWorker.addEventListener('message', async (event) => {
+            if (!event.data || event.data.type !== 'document-updated') return;
+            try {
+                if (event.data.url === `${apiBase}/links` && !isEditMode) {
+                    currentLinks = await fetchDocument('links');
+                } else if (event.data.url === `${apiBase}/settings`) {
+                    currentSettings = await fetchDocument('settings');
+                    applySettings();
+                } else {
+                    return;
+                }
+                if (!isEditMode) {
+                    renderLinks();
+                    handleSearch();
+                }
+            } catch (error) {
+                console.error('Error applying updated data:', error);
+            }
+        });
+    }
+
     // --- Initial Load ---
-    fetchAllData();
-    fetchUptimeKumaStatus();
+    fetchAllData().then(subscribeToChanges);
+    fetchWidgets(); // Re-schedules itself using the interval suggested by the server
+});
+"""
+
+# Service worker template; __CACHE_VERSION__ and __SHELL_URLS__ are filled in from the current front-end build.
+DEFAULT_SW = """
+const CACHE_NAME = 'homepagerr-__CACHE_VERSION__';
+const SHELL_URLS = __SHELL_URLS__;
+
+// Matches the JSON documents that are cached for offline use: /api/<doc> and /api/p/<name>/<doc>.
+const isDocumentPath = (path) => {
+    const parts = path.split('/');
+    const doc = parts[parts.length - 1];
+    if (doc !== 'links' && doc !== 'settings') return false;
+    return parts[1] === 'api' && (parts.length === 3 || (parts.length === 5 && parts[2] === 'p'));
+};
+
+// Cached documents that a successful write to `path` may have changed.
+const changedDocumentPaths = (path) => {
+    const base = path.slice(0, path.lastIndexOf('/') + 1);
+    if (path.endsWith('/import')) return [base + 'links'];
+    if (path.endsWith('/batch')) return [base + 'links', base + 'settings'];
+    return isDocumentPath(path) ? [path] : [];
+};
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(caches.open(CACHE_NAME).then(cache => cache.addAll(SHELL_URLS)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key.startsWith('homepagerr-') && key !== CACHE_NAME).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+const notifyClients = async (path) => {
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach(client => client.postMessage({ type: 'document-updated', url: path }));
+};
+
+const fetchAndCache = async (request) => {
+    const response = await fetch(request);
+    if (response.ok) await (await caches.open(CACHE_NAME)).put(request, response.clone());
+    return response;
+};
+
+const refreshCached = async (path) => {
+    const response = await fetch(path, { cache: 'no-store' });
+    if (response.ok) await (await caches.open(CACHE_NAME)).put(path, response);
+};
 
-    // --- Set up refresh interval ---
-    setInterval(fetchUptimeKumaStatus, 60000); // 60000ms = 1 minute
+// Answers from the cache immediately and revalidates against the server in the background.
+// For API documents (`notify`), open pages are told when the server's copy has changed.
+const staleWhileRevalidate = async (event, notify) => {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(event.request);
+    const cachedTag = cached ? cached.headers.get('ETag') : null;
+    const revalidate = (async () => {
+        const headers = cachedTag ? { 'If-None-Match': cachedTag } : {};
+        const response = await fetch(event.request.url, { headers, cache: 'no-store', credentials: 'same-origin' });
+        if (response.status === 304) return cached;
+        if (response.ok) {
+            await cache.put(event.request, response.clone());
+            if (notify && cached && response.headers.get('ETag') !== cachedTag) {
+                await notifyClients(new URL(event.request.url).pathname);
+            }
+        }
+        return response;
+    })();
+    if (cached) {
+        event.waitUntil(revalidate.catch(() => {}));
+        return cached;
+    }
+    return revalidate;
+};
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (request.method === 'POST') {
+        const documentPaths = changedDocumentPaths(url.pathname);
+        if (!documentPaths.length) return;
+        const saved = fetch(request);
+        event.respondWith(saved);
+        event.waitUntil(saved.then(response => response.ok ? Promise.all(documentPaths.map(refreshCached)) : null).catch(() => {}));
+        return;
+    }
+    if (request.method !== 'GET') return;
+
+    if (request.mode === 'navigate' || url.pathname.startsWith('/static/')) {
+        event.respondWith(staleWhileRevalidate(event, false));
+    } else if (isDocumentPath(url.pathname)) {
+        // Pages ask for `cache: 'no-store'` when they must see the server's copy, not the cached one.
+        event.respondWith(request.cache === 'no-store' ? fetchAndCache(request) : staleWhileRevalidate(event, true));
+    }
 });
 """
 
-DEFAULT_NOTES = {"content": ""}
+# notes.json lists the notes; each note's text is stored in notes/<id>.json.
+DEFAULT_NOTES = {"notes": []}
 
 DEFAULT_LINKS = {
     "sections": [
@@ -909,9 +1842,36 @@ DEFAULT_LINKS = {
 }
 
 DEFAULT_SETTINGS = {
-    "pageTitle": "My Homepage", "openLinksInNewTab": True, "linkColumns": 2, "forceOverwriteStaticFiles": False
+    "pageTitle": "My Homepage", "openLinksInNewTab": True, "linkColumns": 2, "showMostUsed": False,
+    "collapsedSections": [], "forceOverwriteStaticFiles": False
 }
 
+# Maps each API document to its file name and default content inside a profile directory.
+DOCUMENTS = {
+    'links': ('links.json', DEFAULT_LINKS),
+    'settings': ('settings.json', DEFAULT_SETTINGS),
+    'notes': ('notes.json', DEFAULT_NOTES),
+}
+
+# Built-in front-end files. Copies are written to STATIC_DIR so they can be customized;
+# the manifest records the hash of the built-in version last written for each file.
+STATIC_ASSETS = {
+    'index.html': DEFAULT_HTML,
+    'style.css': DEFAULT_CSS,
+    'scripts.js': DEFAULT_JS,
+}
+STATIC_MANIFEST_FILE = os.path.join(STATIC_DIR, '.defaults.json')
+# SHA-256 hashes of the built-in files shipped by versions that wrote no manifest. Copies that
+# match one were never customized and are upgraded like any other unmodified copy.
+PREVIOUS_STATIC_HASHES = {
+    'index.html': {'1860dfe8d0dd3198a2e149170afa0115eb0d3ce251713c24a5a869093ce21dff'},
+    'style.css': {'6d0728eae828be80b172709c7127c31941f72767875538f59073b82604f3ce6e'},
+    'scripts.js': {'89450877febcffa1ae883c2037e9f14d8d177244980f40b0c46b8984981c02fc',
+                   'a38256a4c7136b4a64002e8308fac9fc687df414c14fcd2cb4e4526ad2cad194',
+                   '87e216290f1b9575eb2309dd1ec0d72fcb7beb777379736797419fcae968dbe4'},
+}
+STATIC_RELOAD_INTERVAL = float(os.environ.get('STATIC_RELOAD_INTERVAL', '2'))
+
 
 def initialize_app():
     """Ensures that all necessary directories and default configuration files are created."""
@@ -931,16 +1891,27 @@ def initialize_app():
     else:
         with open(SETTINGS_FILE, 'w') as f: json.dump(DEFAULT_SETTINGS, f, indent=4)
 
-    files_to_create = {
-        os.path.join(STATIC_DIR, 'index.html'): DEFAULT_HTML,
-        os.path.join(STATIC_DIR, 'style.css'): DEFAULT_CSS,
-        os.path.join(STATIC_DIR, 'scripts.js'): DEFAULT_JS
-    }
-
-    for fpath, content in files_to_create.items():
-        if not os.path.exists(fpath) or should_overwrite_static:
-            log_message(f"Creating or overwriting '{os.path.basename(fpath)}'.")
-            with open(fpath, 'w', encoding='utf-8') as f: f.write(content)
+    # Copies that still match the built-in version they were created from are updated
+    # automatically; anything else was customized by the user and is left alone.
+    manifest = read_static_manifest()
+    for name, content in STATIC_ASSETS.items():
+        fpath = os.path.join(STATIC_DIR, name)
+        default_hash = content_hash(content.encode('utf-8'))
+        if os.path.exists(fpath) and not should_overwrite_static:
+            with open(fpath, 'rb') as f: file_hash = content_hash(f.read())
+            if file_hash == default_hash:
+                manifest[name] = default_hash
+                continue
+            if file_hash != manifest.get(name) and file_hash not in PREVIOUS_STATIC_HASHES.get(name, ()):
+                log_message(f"Keeping customized '{name}'.")
+                continue
+            log_message(f"Updating unmodified '{name}' to the built-in version.")
+        else:
+            log_message(f"Creating or overwriting '{name}'.")
+        with open(fpath, 'w', encoding='utf-8') as f: f.write(content)
+        manifest[name] = default_hash
+    write_json_atomic(STATIC_MANIFEST_FILE, manifest)
+    log_message(f"[Build] Front-end: {asset_store.build().report}")
 
     if not os.path.exists(LINKS_FILE):
         with open(LINKS_FILE, 'w') as f: json.dump(DEFAULT_LINKS, f, indent=4)
@@ -948,101 +1919,1960 @@ def initialize_app():
     if not os.path.exists(NOTES_FILE):
         with open(NOTES_FILE, 'w') as f: json.dump(DEFAULT_NOTES, f, indent=4)
 
+    for name in CONFIGURED_PROFILES:
+        if PROFILE_NAME_PATTERN.match(name):
+            Profile(name).ensure_files()
+        else:
+            log_message(f"[Profiles] Warning: Ignoring invalid profile name '{name}' in PROFILES.")
+
+    if snapshot_writer:
+        snapshot_writer.write_all()
+
 
 # --- App Definition ---
-app = Flask(__name__, static_url_path='/static', static_folder=STATIC_DIR)
+# Static files are served by the `static_file` route so built-in assets can come from memory.
+app = Flask(__name__, static_folder=None)
 
 # Helper function to print to stderr for Docker logs
 def log_message(message):
     print(message, file=sys.stderr, flush=True)
 
-@app.route('/')
-def index():
-    """Serves the main index.html file."""
-    return send_from_directory(STATIC_DIR, 'index.html')
+# --- Shared Cache ---
+CacheEntry = namedtuple('CacheEntry', ['version', 'expires_at', 'value'])
 
-@app.route('/health')
-def health_check():
-    """Provides a simple health check endpoint."""
-    return jsonify({"status": "ok"}), 200
+class SharedCache:
+    """
+    Byte cache shared by all worker processes, stored in SQLite under DATA_DIR.
+    Every entry has a version that is bumped on each write; workers keep the last value they
+    read and only transfer it again when the version has changed. An expired entry is
+    refreshed by a single worker holding a lease while the others keep serving the old value.
+    """
 
-def get_json_file(file_path):
-    """Helper function to read and serve a JSON file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return jsonify(json.load(f))
-    except Exception as e:
-        return jsonify({"error": f"Could not read file: {e}"}), 500
+    PRUNE_INTERVAL = 60
+    PRUNE_GRACE = 3600
+    POOL_SIZE = 4
 
-def save_json_file(file_path):
-    """Helper function to save JSON data from a request to a file."""
-    try:
-        data = request.get_json()
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        return jsonify({"message": "Saved"}), 200
-    except Exception as e:
-        return jsonify({"error": f"Failed to save file: {e}"}), 500
+    def __init__(self, path):
+        self.path = path
+        self._pool = []
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+        self._next_prune = 0
 
-# --- API Routes ---
-@app.route('/api/links', methods=['GET', 'POST'])
-def handle_links():
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, version INTEGER NOT NULL, expires_at REAL NOT NULL, value BLOB)')
+        conn.execute('CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)')
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """
+        Lends an idle connection of this process, opening one only if none is free. Connections
+        are pooled per process rather than kept per thread: under gevent, threading.local is
+        per greenlet, so every request would open a connection of its own.
+        """
+        pid = os.getpid()
+        with self._pool_lock:
+            if self._pool_pid != pid:
+                self._pool, self._pool_pid = [], pid  # Connections inherited from the parent are left alone
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                if self._pool_pid == pid and len(self._pool) < self.POOL_SIZE:
+                    self._pool.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @staticmethod
+    def _owner():
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def get(self, key):
+        """Returns the entry for `key`, or None. The value is only read from SQLite if its version changed."""
+        with self._memo_lock:
+            memo = self._memo.get(key)
+        known_version = memo.version if memo else None
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT version, expires_at, CASE WHEN version = ? THEN NULL ELSE value END FROM entries WHERE key = ?',
+                (known_version, key)).fetchone()
+        if row is None:
+            return None
+        if row[0] == known_version:
+            return CacheEntry(row[0], row[1], memo.value)
+        entry = CacheEntry(*row)
+        with self._memo_lock:
+            self._memo[key] = entry
+        return entry
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT INTO entries (key, version, expires_at, value) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET version = version + 1, expires_at = excluded.expires_at, value = excluded.value',
+                (key, now + ttl, value))
+            if now >= self._next_prune:
+                self._next_prune = now + self.PRUNE_INTERVAL
+                conn.execute('DELETE FROM entries WHERE expires_at < ?', (now - self.PRUNE_GRACE,))
+
+    def acquire(self, name, ttl):
+        """Tries to take the lease `name` for `ttl` seconds. Expired leases can be taken over."""
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.expires_at < ? OR leases.owner = excluded.owner',
+                (name, self._owner(), now + ttl, now))
+            return cursor.rowcount == 1
+
+    def release(self, name):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, self._owner()))
+
+    def fetch(self, key, ttl, refresh, lease_ttl=30):
+        """
+        Returns the cached bytes for `key`, calling `refresh()` for new bytes once they expire.
+        Only the worker that wins the lease refreshes; the others return the stale value, or
+        wait for the first one if there is none yet.
+        """
+        try:
+            deadline = time.time() + lease_ttl
+            while True:
+                entry = self.get(key)
+                if entry and entry.expires_at > time.time():
+                    return entry.value
+                if self.acquire(key, lease_ttl):
+                    try:
+                        value = refresh()
+                        self.set(key, value, ttl)
+                        return value
+                    finally:
+                        self.release(key)
+                if entry:
+                    return entry.value
+                if time.time() > deadline:
+                    break
+                time.sleep(0.1)
+        except sqlite3.Error as e:
+            log_message(f"[Cache] Warning: shared cache unavailable, fetching directly: {e}")
+        return refresh()
+
+
+shared_cache = SharedCache(SHARED_CACHE_FILE)
+
+# --- Profile Data ---
+# Every stored document carries a revision counter under REVISION_KEY. It is stripped
+# from API payloads and exposed as the response ETag instead.
+REVISION_KEY = '_revision'
+# `digest` identifies the file contents a document was read from (None for documents built in
+# memory), so a hand edit that keeps the revision still changes cached bodies and ETags.
+Document = namedtuple('Document', ['revision', 'data', 'digest'], defaults=[None])
+
+def decayed_score(score, scored_at, now):
+    """A click score recorded at `scored_at`, halved for every CLICK_HALF_LIFE seconds since."""
+    return score * 0.5 ** (max(now - scored_at, 0) / CLICK_HALF_LIFE)
+
+
+def note_document(note_id):
+    return f"{NOTE_DOC_PREFIX}{note_id}"
+
+def note_entry(note_id, title, content):
+    """A note's entry in the notes listing; `size` is the length of its text in characters."""
+    return {"id": note_id, "title": title, "size": len(content), "updated": int(time.time())}
+
+
+class RevisionConflict(Exception):
+    """Raised when a write expects a revision that no longer matches the stored document."""
+
+    def __init__(self, current):
+        super().__init__(f"Document was changed elsewhere (current revision {current.revision}).")
+        self.current = current
+
+
+def write_json_atomic(fpath, data, compact=False):
+    """Writes JSON to a temporary file next to `fpath` and renames it into place, so readers never see a partial file."""
+    text = json.dumps(data, separators=(',', ':')) if compact else json.dumps(data, indent=4)
+    write_file_atomic(fpath, text.encode('utf-8'))
+
+def write_file_atomic(fpath, body):
+    """Writes bytes to a temporary file next to `fpath` and renames it into place, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(fpath), prefix=f".{os.path.basename(fpath)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, fpath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class Profile:
+    """
+    One dashboard profile: a directory holding links, settings and notes.
+    Parsed documents are kept in memory and re-read only when the file on disk changes.
+    Writes are serialized across threads and worker processes by a lock file; reads never lock.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.data_dir = DATA_DIR if name == DEFAULT_PROFILE else os.path.join(PROFILES_DIR, name)
+        self.last_used = time.monotonic()
+        self._documents = {}
+        self._bodies = {}
+        self._changes = None
+        self._clicks = None
+        self._commit_mutex = threading.Lock()
+        self._link_monitors = None
+        self._lock = threading.Lock()
+
+    def exists(self):
+        """Whether the profile has been created; the default profile always exists."""
+        return self.name == DEFAULT_PROFILE or os.path.isdir(self.data_dir)
+
+    def path(self, doc):
+        if doc.startswith(NOTE_DOC_PREFIX):
+            return os.path.join(self.data_dir, 'notes', f"{doc[len(NOTE_DOC_PREFIX):]}.json")
+        return os.path.join(self.data_dir, DOCUMENTS[doc][0])
+
+    def ensure_files(self):
+        """Creates the profile directory and any missing documents, and finishes an interrupted batch commit."""
+        os.makedirs(os.path.join(self.data_dir, 'notes'), exist_ok=True)
+        for doc, (_, default) in DOCUMENTS.items():
+            fpath = self.path(doc)
+            if not os.path.exists(fpath):
+                with open(fpath, 'w', encoding='utf-8') as f: json.dump(default, f, indent=4)
+        if os.path.exists(self._journal_path()):
+            with self.commit_lock():
+                # Checked again under the lock: a commit in another worker may have finished meanwhile.
+                if os.path.exists(self._journal_path()):
+                    self._replay_journal()
+        if 'notes' not in self.read('notes').data:
+            with self.commit_lock():
+                self._migrate_notes()
+
+    def _migrate_notes(self):
+        """Moves the single scratchpad of older versions ({"content": ...} in notes.json) into a note of its own."""
+        listing = self.read('notes')
+        if 'notes' in listing.data:
+            return
+        content = listing.data.get('content') or ''
+        documents = {'notes': Document(listing.revision + 1, {"notes": []})}
+        if content:
+            documents[note_document(LEGACY_NOTE_ID)] = Document(1, {"title": "Scratchpad", "content": content})
+            documents['notes'].data["notes"].append(note_entry(LEGACY_NOTE_ID, "Scratchpad", content))
+        self.apply_commit(documents)
+        log_message(f"[Profiles] Moved the scratchpad of profile '{self.name}' to notes/.")
+
+    def _journal_path(self):
+        return os.path.join(self.data_dir, '.journal.json')
+
+    @contextmanager
+    def commit_lock(self, shared=False):
+        """Holds the profile's write lock. Shared holders see a snapshot no writer can change underneath them."""
+        # The in-process lock comes first: under gevent, a greenlet blocked in flock() would stall
+        # the whole worker, including the greenlet of the same process that holds the file lock.
+        with self._commit_mutex, open(os.path.join(self.data_dir, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read(self, doc):
+        """Returns the document and its revision, reusing the cached copy while the file is unchanged."""
+        fpath = self.path(doc)
+        stat = os.stat(fpath)
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._documents.get(doc)
+            if cached and cached[0] == stat_key:
+                return cached[1]
+        with open(fpath, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        revision = data.pop(REVISION_KEY, 0) if isinstance(data, dict) else 0
+        document = Document(revision, data, content_hash(raw)[:16])
+        with self._lock:
+            self._documents[doc] = (stat_key, document)
+        return document
+
+    def commit(self, doc, data, expected_revision=None):
+        """
+        Stores `data` as the next revision of `doc`. When `expected_revision` is given the write
+        only happens if it still matches the stored revision (compare-and-swap), otherwise
+        RevisionConflict is raised carrying the current document.
+        """
+        with self.commit_lock():
+            current = self.read(doc)
+            if expected_revision is not None and expected_revision != current.revision:
+                raise RevisionConflict(current)
+            document = Document(current.revision + 1, data)
+            self.apply_commit({doc: document})
+        return document
+
+    def apply_commit(self, documents, deleted=()):
+        """
+        Writes new revisions of one or more documents; the caller must hold the commit lock.
+        Several documents are first written together to a journal, which is the single commit
+        point: if the process dies while applying it, the journal is replayed on the next load.
+        `deleted` names documents the caller removes, recorded in the change log without a revision.
+        """
+        patches = {}
+        if 'links' in documents and os.path.exists(self.path('links')):
+            previous = self.read('links')
+            patch = sections_patch(previous.data, documents['links'].data)
+            if patch is not None:
+                patches['links'] = {"base": previous.revision, "sections": patch}
+        payloads = {doc: {REVISION_KEY: document.revision, **document.data} for doc, document in documents.items()}
+        if len(payloads) > 1:
+            write_json_atomic(self._journal_path(), payloads)
+            self._replay_journal()
+        else:
+            for doc, payload in payloads.items():
+                write_json_atomic(self.path(doc), payload)
+        with self._lock:
+            for doc in documents:
+                self._documents.pop(doc, None)
+        self._record_changes({**{doc: document.revision for doc, document in documents.items()}, **{doc: None for doc in deleted}}, patches)
+
+    def read_note(self, note_id):
+        """Returns a note, or an empty revision-0 document if there is no such note."""
+        try:
+            return self.read(note_document(note_id))
+        except FileNotFoundError:
+            return Document(0, None)
+
+    def commit_note(self, note_id, title, content, expected_revision=None, expected_listing_revision=None):
+        """
+        Saves a note together with its entry in the notes listing, creating the note if it is new.
+        With `expected_listing_revision`, the save is checked against the listing instead, whose
+        revision changes with every note; RevisionConflict then carries the listing.
+        """
+        with self.commit_lock():
+            current = self.read_note(note_id)
+            if expected_revision is not None and expected_revision != current.revision:
+                raise RevisionConflict(current)
+            listing = self.read('notes')
+            if expected_listing_revision is not None and expected_listing_revision != listing.revision:
+                raise RevisionConflict(listing)
+            entry = note_entry(note_id, title, content)
+            notes = [entry if note["id"] == note_id else note for note in listing.data["notes"]]
+            if current.revision == 0:
+                notes.append(entry)
+            document = Document(current.revision + 1, {"title": title, "content": content})
+            self.apply_commit({note_document(note_id): document, 'notes': Document(listing.revision + 1, {"notes": notes})})
+        return document
+
+    def delete_note(self, note_id, expected_revision=None):
+        """Removes a note from the listing and deletes its file. Returns False if there is no such note."""
+        with self.commit_lock():
+            current = self.read_note(note_id)
+            if current.revision == 0:
+                return False
+            if expected_revision is not None and expected_revision != current.revision:
+                raise RevisionConflict(current)
+            listing = self.read('notes')
+            notes = [note for note in listing.data["notes"] if note["id"] != note_id]
+            self.apply_commit({'notes': Document(listing.revision + 1, {"notes": notes})}, deleted=[note_document(note_id)])
+            os.unlink(self.path(note_document(note_id)))
+        with self._lock:
+            self._documents.pop(note_document(note_id), None)
+        return True
+
+    def _changes_path(self):
+        return os.path.join(self.data_dir, '.changes.json')
+
+    def read_changes(self):
+        """Returns the change log {"seq": n, "entries": [...]}, re-read only when the file changes."""
+        try:
+            stat = os.stat(self._changes_path())
+        except FileNotFoundError:
+            return {"seq": 0, "entries": []}
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._changes and self._changes[0] == stat_key:
+                return self._changes[1]
+        with open(self._changes_path(), 'r', encoding='utf-8') as f:
+            changes = json.load(f)
+        with self._lock:
+            self._changes = (stat_key, changes)
+        return changes
+
+    def _record_changes(self, revisions, patches=None):
+        """Appends a commit to the change log; the caller holds the commit lock."""
+        changes = self.read_changes()
+        seq = changes["seq"] + 1
+        entry = {"seq": seq, "revisions": revisions}
+        if patches:
+            entry["patches"] = patches
+        entries = (changes["entries"] + [entry])[-CHANGE_LOG_SIZE:]
+        write_json_atomic(self._changes_path(), {"seq": seq, "entries": entries})
+        change_notifier.notify(self, seq)
+
+    def changes_since(self, since):
+        """
+        Returns (seq, {doc: revision}, {doc: patch}, reset) for everything committed after sequence
+        `since`. A document has a patch only if it changed once since then and the commit recorded one.
+        `reset` means the log no longer reaches back that far and every document should be reloaded.
+        """
+        changes = self.read_changes()
+        seq, entries = changes["seq"], changes["entries"]
+        oldest = entries[0]["seq"] - 1 if entries else seq
+        if since > seq or since < oldest:
+            return seq, {doc: self.read(doc).revision for doc in DOCUMENTS}, {}, True
+        changed, patches = {}, {}
+        for entry in entries:
+            if entry["seq"] > since:
+                changed.update(entry["revisions"])
+                for doc in entry["revisions"]:
+                    patches[doc] = None if doc in patches else entry.get("patches", {}).get(doc)
+        return seq, changed, {doc: patch for doc, patch in patches.items() if patch}, False
+
+    def _clicks_path(self):
+        return os.path.join(self.data_dir, '.clicks.json')
+
+    def read_clicks(self):
+        """Returns the stored click scores {url: [score, timestamp]}, re-read only when the file changes."""
+        try:
+            stat = os.stat(self._clicks_path())
+        except FileNotFoundError:
+            return {}
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._clicks and self._clicks[0] == stat_key:
+                return self._clicks[1]
+        with open(self._clicks_path(), 'r', encoding='utf-8') as f:
+            clicks = json.load(f)
+        with self._lock:
+            self._clicks = (stat_key, clicks)
+        return clicks
+
+    def add_clicks(self, clicks):
+        """
+        Merges buffered clicks {url: (count, timestamp)} into the stored scores with a single write.
+        Only the CLICK_MAX_TRACKED highest scores are kept.
+        """
+        with self.commit_lock():
+            scores = dict(self.read_clicks())
+            for url, (count, timestamp) in clicks.items():
+                score, scored_at = scores.get(url, (0, timestamp))
+                scores[url] = [round(decayed_score(score, scored_at, timestamp) + count, 4), timestamp]
+            if len(scores) > CLICK_MAX_TRACKED:
+                now = time.time()
+                kept = sorted(scores, key=lambda url: decayed_score(*scores[url], now), reverse=True)[:CLICK_MAX_TRACKED]
+                scores = {url: scores[url] for url in kept}
+            write_json_atomic(self._clicks_path(), scores, compact=True)
+
+    def click_scores(self):
+        """The current score of every clicked URL, decayed to now."""
+        now = time.time()
+        return {url: round(decayed_score(score, scored_at, now), 3) for url, (score, scored_at) in self.read_clicks().items()}
+
+    def link_statuses(self, instances, monitor_lists):
+        """
+        Returns {link url: status} for the links watched by an Uptime Kuma monitor, given the
+        `instances` reported by the Uptime Kuma widget and the result of the monitor list widget.
+        The link-to-monitor index is rebuilt only when the links or the monitor lists change;
+        otherwise this is one lookup per monitored link.
+        """
+        links = self.read('links')
+        key = (links.revision, links.digest, tuple((instance["url"], instance["slug"]) for instance in instances),
+               monitor_lists.get("updated"))
+        with self._lock:
+            index = self._link_monitors
+        if index is None or index[0] != key:
+            by_instance = {(entry["url"], entry["slug"]): entry["monitors"] for entry in monitor_lists.get("data") or []}
+            index = (key, build_link_monitor_index(links.data, [by_instance.get((instance["url"], instance["slug"]), {})
+                                                                for instance in instances]))
+            with self._lock:
+                self._link_monitors = index
+        monitors = [instance.get("monitors") or {} for instance in instances]
+        return {url: monitors[instance][monitor_id] for url, instance, monitor_id in index[1] if monitor_id in monitors[instance]}
+
+    def _replay_journal(self):
+        """Applies the pending journal, if any; the caller must hold the commit lock."""
+        try:
+            with open(self._journal_path(), 'r', encoding='utf-8') as f:
+                payloads = json.load(f)
+        except FileNotFoundError:
+            return
+        for doc, payload in payloads.items():
+            write_json_atomic(self.path(doc), payload)
+        os.unlink(self._journal_path())
+
+    def encoded(self, doc, document, encoding=None):
+        """
+        Returns the JSON response body of `document`, compressed with `encoding` if given.
+        Bodies are built once per version (revision and file digest) and reused until the document changes.
+        """
+        version = (document.revision, document.digest)
+        with self._lock:
+            cached, bodies = self._bodies.get(doc, (None, {}))
+            if cached == version and encoding in bodies:
+                return bodies[encoding]
+        if cached != version:
+            bodies = {}
+        plain = bodies.get(None) or app.json.response(document.data).get_data()
+        body = plain
+        if encoding:
+            # Compressed bodies are shared, so each version is compressed by one worker only.
+            body = shared_cache.fetch(f"body:{self.name}:{doc}:{document.revision}:{document.digest}:{encoding}", SHARED_BODY_TTL,
+                                      lambda: compress_body(plain, encoding))
+        with self._lock:
+            cached, current = self._bodies.get(doc, (None, {}))
+            if cached != version:
+                current = {}
+                self._bodies[doc] = (version, current)
+            current[None] = plain
+            current[encoding] = body
+        return body
+
+
+class ProfileCache:
+    """
+    LRU-bounded registry of loaded profiles. Profiles beyond `max_profiles`, or unused for
+    longer than `idle_timeout` seconds, are dropped together with their cached documents.
+    A profile is loaded under a lock of its own, so loading one never holds up lookups of others.
+    """
+
+    def __init__(self, max_profiles, idle_timeout):
+        self.max_profiles = max(1, max_profiles)
+        self.idle_timeout = idle_timeout
+        self._profiles = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, create=False):
+        """Returns the profile `name`, or None if it does not exist and `create` is false."""
+        with self._lock:
+            profile = self._lookup(name)
+            if profile is not None:
+                return profile
+            loading = self._loading.setdefault(name, threading.Lock())
+        try:
+            with loading:
+                with self._lock:
+                    profile = self._lookup(name)
+                if profile is not None:
+                    return profile
+                profile = Profile(name)
+                if not create and not profile.exists():
+                    return None
+                profile.ensure_files()
+                with self._lock:
+                    self._profiles[name] = profile
+                    return self._lookup(name)
+        finally:
+            # Dropped whatever the outcome, so lookups of missing profiles leave nothing behind.
+            with self._lock:
+                if self._loading.get(name) is loading:
+                    del self._loading[name]
+
+    def _lookup(self, name):
+        """Marks a loaded profile as used and returns it; the caller holds the registry lock."""
+        profile = self._profiles.get(name)
+        if profile is not None:
+            now = time.monotonic()
+            self._profiles.move_to_end(name)
+            profile.last_used = now
+            self._evict(now)
+        return profile
+
+    def _evict(self, now):
+        while len(self._profiles) > self.max_profiles:
+            evicted, _ = self._profiles.popitem(last=False)
+            log_message(f"[Profiles] Evicted profile '{evicted}' from cache (LRU).")
+        for name in [n for n, p in self._profiles.items() if now - p.last_used > self.idle_timeout]:
+            del self._profiles[name]
+            log_message(f"[Profiles] Evicted idle profile '{name}' from cache.")
+
+
+profile_cache = ProfileCache(MAX_CACHED_PROFILES, PROFILE_IDLE_TIMEOUT)
+
+# --- Static Assets ---
+Asset = namedtuple('Asset', ['body', 'etag', 'customized'])
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+def read_static_manifest():
+    try:
+        with open(STATIC_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+class AssetStore:
+    """
+    Serves the built-in front-end files from memory with precomputed ETags.
+    A copy on the volume whose hash matches neither the built-in version nor the one recorded
+    in the manifest is a customization and is served instead. The volume is checked at most
+    once every `reload_interval` seconds, so edits are picked up without a restart.
+    """
+
+    def __init__(self, defaults, directory, reload_interval):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._defaults = {}
+        for name, content in defaults.items():
+            body = content.encode('utf-8')
+            digest = content_hash(body)
+            self._defaults[name] = (digest, Asset(body, digest[:16], False))
+        self._assets = {}
+        self._stat_keys = {}
+        self._build = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._defaults
+
+    def version(self):
+        """A short hash that changes whenever any built file changes."""
+        return self.build().version
+
+    def get(self, name):
+        self._refresh_if_due()
+        return self._assets[name]
+
+    def build(self):
+        """The bundled front-end built from the served assets; rebuilt after any of them changes."""
+        self._refresh_if_due()
+        with self._lock:
+            if self._build is None:
+                sources = {name: asset.body.decode('utf-8', 'replace') for name, asset in self._assets.items()}
+                self._build = build_frontend(sources)
+            return self._build
+
+    def _refresh_if_due(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            manifest = None
+            for name in self._defaults:
+                fpath = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(fpath)
+                    stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    stat_key = None
+                if name in self._assets and self._stat_keys.get(name) == stat_key:
+                    continue
+                if manifest is None:
+                    manifest = read_static_manifest()
+                self._assets[name] = self._load(name, fpath if stat_key else None, manifest)
+                self._stat_keys[name] = stat_key
+                self._build = None
+            self._next_check = now + self.reload_interval
+
+    def _load(self, name, fpath, manifest):
+        default_hash, default_asset = self._defaults[name]
+        if fpath is None:
+            return default_asset
+        with open(fpath, 'rb') as f:
+            body = f.read()
+        digest = content_hash(body)
+        if digest in (default_hash, manifest.get(name)) or digest in PREVIOUS_STATIC_HASHES.get(name, ()):
+            return default_asset
+        log_message(f"[Static] Serving customized '{name}' from the volume.")
+        return Asset(body, digest[:16], True)
+
+
+asset_store = AssetStore(STATIC_ASSETS, STATIC_DIR, STATIC_RELOAD_INTERVAL)
+
+def asset_response(name):
+    """Builds a revalidatable response for one of the built-in front-end files."""
+    asset = asset_store.get(name)
+    response = app.response_class(asset.body, mimetype=mimetypes.guess_type(name)[0])
+    response.set_etag(asset.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+# --- Front-end Build ---
+# Rules whose selectors all target elements that stay hidden until the user interacts with
+# the page (edit mode, modals, drag and drop) are left out of the CSS inlined into index.html.
+DEFERRED_CSS_SELECTORS = ('.edit-mode', '.modal-content', '.modal-actions', '.form-group', '.warning-text',
+                          '#notepad-', '.notepad-', '#note-', '#drag-overlay', '.drag-', '.sortable-', '.import-', '#import-',
+                          '[data-status')
+STYLESHEET_TAG = re.compile(r'<link rel="stylesheet" href="/static/style\.css"\s*/?>')
+SCRIPT_TAG = re.compile(r'<script src="/static/scripts\.js"></script>')
+EXTERNAL_SCRIPT_TAG = re.compile(r'<script src="(https?://[^"]+)"></script>')
+
+BuiltFile = namedtuple('BuiltFile', ['mimetype', 'etag', 'bodies'])
+FrontendBuild = namedtuple('FrontendBuild', ['index', 'files', 'version', 'report'])
+
+JS_IDENTIFIER_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$')
+JS_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = frozenset(('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete',
+                               'throw', 'new', 'yield', 'await'))
+JS_PUNCTUATORS = frozenset('{}()[];,:=<>?!&|*%^~')
+# A line break can only be dropped where automatic semicolon insertion cannot apply.
+JS_JOIN_AFTER = frozenset('{([,;=:?&|<>!')
+JS_JOIN_BEFORE = frozenset('.)]},:?&|=')
+CSS_PUNCTUATORS = frozenset('{};,>')
+
+def _skip_js_literal(source, i):
+    """Returns the index just past the string or regular expression literal starting at `i`."""
+    quote, i, in_class = source[i], i + 1, False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        i += 1
+        if quote == '/':
+            if char == '[':
+                in_class = True
+            elif char == ']':
+                in_class = False
+            elif char == '/' and not in_class:
+                break
+        elif char == quote:
+            break
+    if quote == '/':
+        while i < len(source) and source[i] in JS_IDENTIFIER_CHARS:
+            i += 1
+    return i
+
+def _minify_js(source, i=0, in_substitution=False):
+    """
+    Removes comments and redundant whitespace from JavaScript starting at `i`. Literals are
+    copied verbatim and line breaks are kept wherever a statement could end on them.
+    Returns the minified code and the index where scanning stopped.
+    """
+    out = []
+    pending = None
+    last = ''
+    word = ''
+    depth = 0
+    n = len(source)
+
+    def emit(text, first):
+        nonlocal pending
+        if pending and out:
+            prev = out[-1][-1]
+            if pending == '\n' and prev not in JS_JOIN_AFTER and first not in JS_JOIN_BEFORE:
+                out.append('\n')
+            elif pending == ' ' and prev not in JS_PUNCTUATORS and first not in JS_PUNCTUATORS and not (
+                    (prev in '+-') != (first in '+-')):
+                out.append(' ')
+        pending = None
+        out.append(text)
+
+    while i < n:
+        char = source[i]
+        if char in ' \t\r\n':
+            if char == '\n' or pending != '\n':
+                pending = '\n' if char == '\n' else ' '
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if '\n' in source[i:end]:
+                pending = '\n'
+            elif pending is None:
+                pending = ' '
+            i = end
+        elif char in '\'"' or (char == '/' and (not last or last in JS_REGEX_PRECEDERS or word in JS_REGEX_KEYWORDS)):
+            end = _skip_js_literal(source, i)
+            emit(source[i:end], char)
+            i, last, word = end, '"', ''
+        elif char == '`':
+            parts, i = ['`'], i + 1
+            while i < n and source[i] != '`':
+                if source[i] == '\\':
+                    parts.append(source[i:i + 2])
+                    i += 2
+                elif source.startswith('${', i):
+                    code, i = _minify_js(source, i + 2, True)
+                    parts.append('${' + code + '}')
+                    i += 1
+                else:
+                    parts.append(source[i])
+                    i += 1
+            parts.append('`')
+            emit(''.join(parts), '`')
+            i, last, word = i + 1, '"', ''
+        else:
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if in_substitution and depth == 0:
+                    break
+                depth -= 1
+            emit(char, char)
+            word = word + char if char in JS_IDENTIFIER_CHARS else ''
+            last = char
+            i += 1
+    return ''.join(out), i
+
+def minify_js(source):
+    return _minify_js(source)[0].strip()
+
+def minify_css(source):
+    """Removes comments and redundant whitespace from a stylesheet, leaving strings untouched."""
+    out = []
+    pending = False
+    i, n = 0, len(source)
+    while i < n:
+        char = source[i]
+        if char in ' \t\r\n':
+            pending = True
+            i += 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            pending = True
+        else:
+            if char in '\'"':
+                end = _skip_js_literal(source, i)
+                text, i = source[i:end], end
+            else:
+                text, i = char, i + 1
+            if char == '}' and out and out[-1] == ';':
+                out.pop()
+            if pending and out and out[-1] not in CSS_PUNCTUATORS and out[-1] != ':' and char not in CSS_PUNCTUATORS and char != '!':
+                out.append(' ')
+            pending = False
+            out.append(text)
+    return ''.join(out).strip()
+
+def minify_html(source):
+    """Drops comments and indentation; line breaks are kept so inline spacing is unchanged."""
+    source = re.sub(r'<!--.*?-->', '', source, flags=re.S)
+    return re.sub(r'\n\s+', '\n', source).strip() + '\n'
+
+def css_rules(source):
+    """Splits a stylesheet into its top-level rules and statements."""
+    start, depth, i = 0, 0, 0
+    while i < len(source):
+        char = source[i]
+        if char in '\'"':
+            i = _skip_js_literal(source, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                yield source[start:i + 1].strip()
+                start = i + 1
+        elif char == ';' and depth == 0:
+            yield source[start:i + 1].strip()
+            start = i + 1
+        i += 1
+    if source[start:].strip():
+        yield source[start:].strip()
+
+def split_critical_css(source):
+    """Returns the (critical, deferred) parts of a stylesheet; at-rules always stay critical."""
+    critical, deferred = [], []
+    for rule in css_rules(source):
+        selectors = rule.split('{', 1)[0].split(',')
+        if not rule.startswith('@') and all(any(hint in selector for hint in DEFERRED_CSS_SELECTORS) for selector in selectors):
+            deferred.append(rule)
+        else:
+            critical.append(rule)
+    return ''.join(critical), ''.join(deferred)
+
+def built_file(body, mimetype):
+    """Precompresses a build output once so requests never compress it again."""
+    bodies = {None: body, 'gzip': compress_body(body, 'gzip')}
+    if brotli:
+        bodies['br'] = compress_body(body, 'br')
+    return BuiltFile(mimetype, content_hash(body)[:16], bodies)
+
+def blocking_requests(html):
+    """Counts the document plus the stylesheets and scripts in `html` that block the first render."""
+    html = re.sub(r'<noscript>.*?</noscript>', '', html, flags=re.S)
+    stylesheets = [tag for tag in re.findall(r'<link [^>]*rel="stylesheet"[^>]*>', html) if 'media="print"' not in tag]
+    scripts = [tag for tag in re.findall(r'<script [^>]*src=[^>]*>', html) if ' defer' not in tag and ' async' not in tag]
+    return 1 + len(stylesheets) + len(scripts)
+
+def build_frontend(sources):
+    """
+    Builds what the browser actually loads from the served front-end files: the critical CSS is
+    inlined into index.html, the rest of the stylesheet is loaded without blocking rendering and
+    the script becomes a deferred bundle. Bundle file names carry a content hash, so they can be
+    cached forever.
+    """
+    minify = (minify_js, minify_css, minify_html) if MINIFY_ASSETS else (str.strip, str.strip, str)
+    script = minify[0](sources['scripts.js'])
+    critical_css, deferred_css = split_critical_css(minify[1](sources['style.css']))
+    html = sources['index.html']
+
+    files = {}
+    bundle = built_file(script.encode('utf-8'), 'text/javascript')
+    bundle_name = f"bundle.{bundle.etag[:10]}.js"
+    files[bundle_name] = bundle
+    html = SCRIPT_TAG.sub(lambda m: f'<script src="/static/{bundle_name}" defer></script>', html)
+
+    styles = f"<style>{critical_css}</style>"
+    if deferred_css:
+        stylesheet = built_file(deferred_css.encode('utf-8'), 'text/css')
+        stylesheet_name = f"style.{stylesheet.etag[:10]}.css"
+        files[stylesheet_name] = stylesheet
+        link = f'<link rel="stylesheet" href="/static/{stylesheet_name}"'
+        styles += link + ' media="print" onload="this.media=\'all\'">' + f'<noscript>{link}></noscript>'
+    html = STYLESHEET_TAG.sub(lambda m: styles, html)
+    html = EXTERNAL_SCRIPT_TAG.sub(lambda m: f'<script src="{m.group(1)}" defer></script>', html)
+    index = built_file(minify[2](html).encode('utf-8'), 'text/html')
+
+    before = [content.encode('utf-8') for content in sources.values()]
+    after = [index.bodies[None]] + [built.bodies[None] for built in files.values()]
+    report = (f"{len(before)} files, {sum(map(len, before))} bytes "
+              f"({sum(len(gzip.compress(body)) for body in before)} gzipped), "
+              f"{blocking_requests(sources['index.html'])} blocking requests -> "
+              f"{len(after)} files, {sum(map(len, after))} bytes "
+              f"({sum(len(gzip.compress(body)) for body in after)} gzipped), "
+              f"{blocking_requests(html)} blocking request(s)")
+    version = content_hash(index.etag.encode('utf-8') + b''.join(built.etag.encode('utf-8') for built in files.values()))[:16]
+    return FrontendBuild(index, files, version, report)
+
+def built_file_response(built, cache_control):
+    encoding = negotiate_encoding(len(built.bodies[None]))
+    response = app.response_class(built.bodies[encoding] if encoding else built.bodies[None], mimetype=built.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(built.etag)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+# --- Static Snapshot ---
+TITLE_TAG = re.compile(r'<title>[^<]*</title>')
+PAGE_TITLE_HEADING = re.compile(r'(<h1 id="page-title">)[^<]*(</h1>)')
+LINKS_CONTAINER = re.compile(r'(<main id="links-container">).*?(</main>)', re.S)
+SNAPSHOT_ASSET_NAME = re.compile(r'^((?:bundle|style)\.[0-9a-f]{10}\.(?:js|css))(?:\.gz|\.br)?$')
+
+def render_link_sections(links, settings):
+    """Renders the sections as the page does outside edit mode, so links show before any script runs."""
+    target = '_blank' if settings.get('openLinksInNewTab') else '_self'
+    collapsed = set(settings.get('collapsedSections') or [])
+    parts = []
+    for index, section in enumerate(links.get('sections', [])):
+        title = section.get('title', '')
+        section_links = section.get('links') or []
+        parts.append(f'<div class="section{" collapsed" if title in collapsed else ""}" data-section-index="{index}">'
+                     f'<h2 class="section-toggle">{escape(title)}<span class="section-count">{len(section_links)}</span></h2>'
+                     f'<ul class="links" data-section-index="{index}">')
+        if title not in collapsed:
+            for link in section_links:
+                name, url = link.get('name', ''), link.get('url', '')
+                parts.append(f'<li class="link-item"><a href="{escape(url)}" target="{target}" data-name="{escape(name.lower())}" '
+                             f'data-url="{escape(url.lower())}">{escape(name)}</a></li>')
+        parts.append('</ul></div>')
+    return ''.join(parts)
+
+def snapshot_page(index_html, links, settings):
+    """
+    Bakes a profile's links and settings into the built index.html: the links are rendered in
+    place, and the documents with their revisions are embedded so the script needs no request.
+    """
+    title = escape(settings.data.get('pageTitle') or 'Homepage')
+    html = TITLE_TAG.sub(lambda m: f'<title>{title}</title>', index_html, count=1)
+    html = PAGE_TITLE_HEADING.sub(lambda m: m.group(1) + title + m.group(2), html, count=1)
+    html = LINKS_CONTAINER.sub(lambda m: m.group(1) + render_link_sections(links.data, settings.data) + m.group(2), html, count=1)
+    data = json.dumps({"links": links.data, "settings": settings.data,
+                       "revisions": {"links": links.revision, "settings": settings.revision}}, separators=(',', ':'))
+    # No "</script>" or "<!--" in a link name may end the script element early.
+    data = data.replace('<', '\\u003c')
+    return html.replace('</body>', f'<script id="snapshot-data" type="application/json">{data}</script></body>', 1)
+
+
+class SnapshotWriter:
+    """
+    Keeps a static copy of the dashboard in `directory` for a web server to serve: each profile's
+    page with its links baked in (`index.html` and `p/<name>/index.html`), the fingerprinted
+    bundles under `static/` and `sw.js`, each with precompressed .gz and .br variants.
+    Every file is replaced atomically, and bundles are written before the pages that use them.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, profile):
+        """Regenerates a profile's page in the background; saves made meanwhile share one regeneration."""
+        with self._lock:
+            if profile.name in self._pending:
+                return
+            self._pending.add(profile.name)
+        self._executor.submit(self._run, profile)
+
+    def _run(self, profile):
+        with self._lock:
+            self._pending.discard(profile.name)
+        try:
+            self.write(profile)
+        except Exception as e:
+            log_message(f"[Snapshot] ERROR: Could not write the snapshot of profile '{profile.name}'. Details: {e}")
+
+    def write_all(self):
+        """Writes the pages of the default profile and of every named profile on disk."""
+        names = [DEFAULT_PROFILE]
+        if os.path.isdir(PROFILES_DIR):
+            names += sorted(name for name in os.listdir(PROFILES_DIR) if PROFILE_NAME_PATTERN.match(name))
+        for name in names:
+            profile = profile_cache.get(name)
+            if profile is not None:
+                self.write(profile)
+        log_message(f"[Snapshot] Wrote {len(names)} page(s) to '{self.directory}'.")
+
+    def write(self, profile):
+        build = asset_store.build()
+        static_dir = os.path.join(self.directory, 'static')
+        for name, built in build.files.items():
+            if not os.path.exists(os.path.join(static_dir, name)):
+                self._write_variants(os.path.join(static_dir, name), built)
+        self._write_variants(os.path.join(self.directory, 'sw.js'),
+                             built_file(service_worker_body(build).encode('utf-8'), 'text/javascript'))
+        page_dir = self.directory if profile.name == DEFAULT_PROFILE else os.path.join(self.directory, 'p', profile.name)
+        # Reading and writing under the shared lock keeps concurrent regenerations in commit order:
+        # no save can land between reading the documents and replacing the page.
+        with profile.commit_lock(shared=True):
+            page = snapshot_page(build.index.bodies[None].decode('utf-8'), profile.read('links'), profile.read('settings'))
+            self._write_variants(os.path.join(page_dir, 'index.html'), built_file(page.encode('utf-8'), 'text/html'))
+        self._prune(static_dir, build)
+
+    def _write_variants(self, fpath, built):
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+            if encoding in built.bodies:
+                write_file_atomic(fpath + suffix, built.bodies[encoding])
+        write_file_atomic(fpath, built.bodies[None])
+
+    def _prune(self, static_dir, build):
+        """Removes the bundles of earlier builds once pages loaded before the rebuild no longer need them."""
+        cutoff = time.time() - SNAPSHOT_ASSET_GRACE
+        for name in os.listdir(static_dir):
+            match = SNAPSHOT_ASSET_NAME.match(name)
+            if not match or match.group(1) in build.files:
+                continue
+            try:
+                if os.stat(os.path.join(static_dir, name)).st_mtime < cutoff:
+                    os.unlink(os.path.join(static_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+snapshot_writer = SnapshotWriter(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+
+# --- Response Compression ---
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+def negotiate_encoding(size):
+    """Picks the best compression the client accepts for a body of `size` bytes, or None."""
+    if size < COMPRESSION_MIN_SIZE:
+        return None
+    return request.accept_encodings.best_match(['br', 'gzip'] if brotli else ['gzip'])
+
+def request_body_stream():
+    """The request body as a file object, decompressing `Content-Encoding: gzip` on the fly."""
+    encoding = (request.content_encoding or 'identity').lower()
+    if encoding == 'identity':
+        return request.stream
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=request.stream, mode='rb')
+    abort(415)
+
+def request_json():
+    """Parses the request body as JSON, accepting gzip-compressed bodies. Returns None if it is not valid JSON."""
+    if (request.content_encoding or 'identity').lower() == 'identity':
+        return request.get_json(silent=True)
+    try:
+        body = request_body_stream().read(MAX_REQUEST_BODY_SIZE + 1)
+    except (OSError, EOFError):
+        return None
+    if len(body) > MAX_REQUEST_BODY_SIZE:
+        abort(413)
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+# --- Bookmark Import ---
+IMPORT_CHUNK_SIZE = 64 * 1024
+IMPORT_SKIPPED_SCHEMES = ('javascript', 'place', 'data', 'about', 'chrome')
+IMPORT_DEFAULT_SECTION = 'Imported'
+
+def normalize_url(url):
+    """Reduces a URL to a comparable key: lower-case scheme and host, no fragment, no trailing slash."""
+    url = url.strip()
+    parts = urlsplit(url if '://' in url else f"http://{url}")
+    query = f"?{parts.query}" if parts.query else ''
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}{query}"
+
+def url_host(url):
+    """The lower-case host name of a URL or bare host, without port or credentials."""
+    url = url.strip()
+    return urlsplit(url if '://' in url else f"http://{url}").hostname or ''
+
+def build_link_monitor_index(links, monitor_lists):
+    """
+    Pairs links with Uptime Kuma monitors, given each instance's {monitor id: url or hostname}.
+    A monitor of the same normalized URL wins; otherwise the first monitor of the same host is
+    used. Returns [(link url, instance index, monitor id)] with each URL once, all that a status
+    lookup needs.
+    """
+    by_url, by_host = {}, {}
+    for instance, monitor_urls in enumerate(monitor_lists):
+        for monitor_id, target in monitor_urls.items():
+            try:
+                url, host = normalize_url(target), url_host(target)
+            except ValueError:
+                continue
+            by_url.setdefault(url, (instance, monitor_id))
+            if host:
+                by_host.setdefault(host, (instance, monitor_id))
+    pairs = {}
+    for section in links.get("sections", []):
+        for link in section.get("links") or []:
+            url = link.get("url") or ''
+            if url in pairs:
+                continue
+            try:
+                pairs[url] = by_url.get(normalize_url(url)) or by_host.get(url_host(url) or None)
+            except ValueError:
+                pairs[url] = None
+    return [(url, *monitor) for url, monitor in pairs.items() if monitor]
+
+
+class BookmarkImporter:
+    """
+    Merges imported bookmarks into a links document. Each folder path becomes a section
+    (existing sections with the same title are extended) and URLs already present anywhere
+    on the board, or earlier in the import, are skipped via a set of normalized URLs.
+    Bookmarks whose URL cannot be parsed are skipped and counted as invalid.
+    """
+
+    def __init__(self, links):
+        self.sections = [{"title": s.get("title", ""), "links": list(s.get("links", []))} for s in links.get("sections", [])]
+        self._by_title = {s["title"]: s for s in self.sections}
+        self._seen = set()
+        for section in self.sections:
+            for link in section["links"]:
+                try:
+                    self._seen.add(normalize_url(link.get("url", "")))
+                except ValueError:
+                    pass  # A malformed URL already on the board cannot match anything
+        self._touched = set()
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def add(self, folders, name, url):
+        url = (url or '').strip()
+        try:
+            if not url or urlsplit(url).scheme.lower() in IMPORT_SKIPPED_SCHEMES:
+                return
+            key = normalize_url(url)
+        except ValueError:
+            self.invalid += 1
+            return
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        self._seen.add(key)
+        title = ' / '.join(folders) or IMPORT_DEFAULT_SECTION
+        section = self._by_title.get(title)
+        if section is None:
+            section = {"title": title, "links": []}
+            self.sections.append(section)
+            self._by_title[title] = section
+        section["links"].append({"name": (name or '').strip() or url, "url": url})
+        self._touched.add(title)
+        self.imported += 1
+
+    def links(self):
+        return {"sections": self.sections}
+
+    def summary(self):
+        return {"imported": self.imported, "duplicates": self.duplicates, "invalid": self.invalid,
+                "sections": len(self._touched)}
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    """
+    Event-based parser for the Netscape bookmark HTML exported by all major browsers.
+    An <H3> names the folder whose contents follow in the next <DL>; every <A HREF> is a bookmark.
+    Nothing but the current folder path is kept, so it can be fed a file of any size in chunks.
+    """
+
+    def __init__(self, on_bookmark):
+        super().__init__(convert_charrefs=True)
+        self.on_bookmark = on_bookmark
+        self._folders = []
+        self._pending_folder = None
+        self._href = None
+        self._text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'h3':
+            self._text = []
+        elif tag == 'a':
+            self._href = dict(attrs).get('href')
+            self._text = []
+        elif tag == 'dl':
+            self._folders.append(self._pending_folder)
+            self._pending_folder = None
+
+    def handle_endtag(self, tag):
+        if tag == 'h3' and self._text is not None:
+            self._pending_folder = ''.join(self._text).strip()
+            self._text = None
+        elif tag == 'a' and self._text is not None:
+            self.on_bookmark([f for f in self._folders if f], ''.join(self._text), self._href)
+            self._href = None
+            self._text = None
+        elif tag == 'dl' and self._folders:
+            self._folders.pop()
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+
+def walk_json_bookmarks(data, on_bookmark):
+    """
+    Walks a JSON bookmark export iteratively: Chrome/Edge `Bookmarks` files, Firefox backups
+    and Homepagerr's own links.json are all trees of named folders with `children` (or `links`).
+    """
+    if isinstance(data, dict) and isinstance(data.get('roots'), dict):
+        roots = [node for node in data['roots'].values() if isinstance(node, dict)]
+    elif isinstance(data, dict) and isinstance(data.get('sections'), list):
+        roots = [{"title": s.get("title"), "children": s.get("links", [])} for s in data['sections'] if isinstance(s, dict)]
+    else:
+        roots = data if isinstance(data, list) else [data]
+    stack = [(node, []) for node in reversed(roots)]
+    while stack:
+        node, folders = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        name = node.get('name') or node.get('title') or ''
+        children = node.get('children')
+        url = node.get('url') or node.get('uri')
+        if url and not children:
+            on_bookmark(folders, name, url)
+        elif isinstance(children, list):
+            path = folders + [name] if name else folders
+            stack.extend((child, path) for child in reversed(children))
+
+
+def parse_bookmark_export(stream, on_bookmark):
+    """
+    Detects the export format from its first bytes and streams bookmarks to `on_bookmark`.
+    HTML is decoded and parsed chunk by chunk. A JSON export is a single nested object that
+    the standard library can only decode whole, so it is loaded in one pass and walked.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    first = decoder.decode(stream.read(IMPORT_CHUNK_SIZE))
+    if first.lstrip()[:1] in ('{', '['):
+        rest = decoder.decode(stream.read(), final=True)
+        walk_json_bookmarks(json.loads(first + rest), on_bookmark)
+        return
+    parser = NetscapeBookmarkParser(on_bookmark)
+    chunk = first
+    while chunk:
+        parser.feed(chunk)
+        raw = stream.read(IMPORT_CHUNK_SIZE)
+        chunk = decoder.decode(raw, final=not raw)
+    parser.close()
+
+
+def get_profile(profile_name, create=False):
+    """
+    Looks up a profile by name, responding with 404 for invalid names and for profiles that do
+    not exist yet. Writes pass `create` to make a new profile.
+    """
+    profile = profile_cache.get(profile_name, create) if PROFILE_NAME_PATTERN.match(profile_name) else None
+    if profile is None:
+        abort(404)
+    return profile
+
+@app.route('/')
+def index():
+    """Serves the built index.html, with the critical CSS inlined."""
+    return built_file_response(asset_store.build().index, 'no-cache')
+
+@app.route('/p/<profile_name>/')
+def profile_index(profile_name):
+    """Serves the shared index.html for a named profile; the frontend picks its API base from the URL."""
+    get_profile(profile_name)
+    return built_file_response(asset_store.build().index, 'no-cache')
+
+def service_worker_body(build):
+    shell_urls = ['/'] + [f"/static/{name}" for name in build.files]
+    return DEFAULT_SW.replace('__CACHE_VERSION__', build.version).replace('__SHELL_URLS__', json.dumps(shell_urls))
+
+@app.route('/sw.js')
+def service_worker():
+    """Serves the generated service worker; its cache name changes whenever a front-end file changes."""
+    body = service_worker_body(asset_store.build())
+    response = app.response_class(body, mimetype='text/javascript')
+    response.set_etag(content_hash(body.encode('utf-8'))[:16])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/static/<path:filename>')
+def static_file(filename):
+    """Serves build outputs and built-in assets from memory and any other file from the static directory."""
+    built = asset_store.build().files.get(filename)
+    if built:
+        # Build outputs are named after their content, so they never change.
+        return built_file_response(built, 'public, max-age=31536000, immutable')
+    if filename in asset_store:
+        return asset_response(filename)
+    return send_from_directory(STATIC_DIR, filename)
+
+@app.route('/health')
+def health_check():
+    """Provides a simple health check endpoint."""
+    return jsonify({"status": "ok"}), 200
+
+def document_etag(document):
+    """The ETag of a document read: its revision, followed by the file digest when known."""
+    return f"{document.revision}-{document.digest}" if document.digest else str(document.revision)
+
+def parse_document_etag(tag):
+    """Splits an ETag made by document_etag() into (revision, digest); the revision is -1 if malformed."""
+    revision, _, digest = tag.partition('-')
+    return (int(revision), digest or None) if revision.isdigit() else (-1, None)
+
+def requested_tag():
+    """The (revision, digest) named by the request's If-Match header, or None if it has none (or `*`)."""
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    for tag in if_match.as_set():
+        revision, digest = parse_document_etag(tag)
+        if revision >= 0:
+            return revision, digest
+    return -1, None
+
+def requested_revision():
+    """
+    Returns the revision a write was based on, taken from its If-Match header.
+    None means the write is unconditional (no header, or `If-Match: *`).
+    """
+    tag = requested_tag()
+    return tag and tag[0]
+
+def stale_read_response(document):
+    """
+    For reads made in several requests (pages of a note, sections of the links): a 412 response
+    when If-Match names a version other than the current one, otherwise None.
+    """
+    tag = requested_tag()
+    if tag is None or (tag[0] == document.revision and tag[1] in (None, document.digest)):
+        return None
+    return jsonify({"error": "The document has changed.", "revision": document.revision}), 412
+
+def revision_conflict_response(error):
+    """409 response carrying the current revision and data, so the client can merge and retry."""
+    response = jsonify({"error": str(error), "revision": error.current.revision, "data": error.current.data})
+    response.set_etag(str(error.current.revision))
+    return response, 409
+
+def get_json_file(profile, doc):
+    """Helper function to serve a profile document from its in-memory cache, tagged with its revision."""
+    try:
+        document = profile.read(doc)
+    except Exception as e:
+        return jsonify({"error": f"Could not read file: {e}"}), 500
+    body = profile.encoded(doc, document)
+    encoding = negotiate_encoding(len(body))
+    if encoding:
+        body = profile.encoded(doc, document, encoding)
+    response = app.response_class(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(document_etag(document))
+    return response.make_conditional(request)
+
+def save_json_file(profile, doc):
+    """
+    Helper function to save JSON data from a request to a profile document.
+    Honors If-Match: a stale revision is rejected with 409 and the current document.
+    """
+    data = request_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object."}), 400
+    try:
+        document = profile.commit(doc, data, requested_revision())
+    except RevisionConflict as e:
+        return revision_conflict_response(e)
+    except Exception as e:
+        return jsonify({"error": f"Failed to save file: {e}"}), 500
+    if snapshot_writer:
+        snapshot_writer.schedule(profile)
+    response = jsonify({"message": "Saved", "revision": document.revision})
+    response.set_etag(str(document.revision))
+    return response, 200
+
+@app.after_request
+def compress_json_response(response):
+    """Compresses JSON responses that were not already encoded, when large enough and accepted by the client."""
+    if (response.mimetype != 'application/json' or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.status_code in (204, 304)):
+        return response
+    body = response.get_data()
+    encoding = negotiate_encoding(len(body))
+    if encoding:
+        response.set_data(compress_body(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+# --- API Routes ---
+# Every data route is available for the default profile at /api/<doc> and for
+# named profiles at /api/p/<name>/<doc>.
+@app.route('/api/links', methods=['GET', 'POST'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/links', methods=['GET', 'POST'])
+def handle_links(profile_name):
+    profile = get_profile(profile_name, create=request.method == 'POST')
     if request.method == 'POST':
-        return save_json_file(LINKS_FILE)
-    return get_json_file(LINKS_FILE)
+        return save_json_file(profile, 'links')
+    return get_json_file(profile, 'links')
+
+def section_index(links):
+    """The light listing of a links document: every section's title and number of links."""
+    return {"sections": [{"title": section.get("title", ''), "count": len(section.get("links") or [])}
+                         for section in links.get("sections", [])]}
+
+@app.route('/api/links/sections', defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/links/sections')
+def get_link_sections(profile_name):
+    """Lists the sections with their link counts, but not the links; the ETag is the links revision."""
+    document = get_profile(profile_name).read('links')
+    response = jsonify(section_index(document.data))
+    response.set_etag(document_etag(document))
+    return response.make_conditional(request)
+
+@app.route('/api/links/sections/<int:index>', defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/links/sections/<int:index>')
+def get_link_section(profile_name, index):
+    """
+    Returns the links of the section at `index`. Send the revision of the section listing in
+    If-Match: if the links changed since, the request fails with 412 instead of returning a
+    section that may have moved.
+    """
+    document = get_profile(profile_name).read('links')
+    stale = stale_read_response(document)
+    if stale:
+        return stale
+    sections = document.data.get("sections", [])
+    if index >= len(sections):
+        abort(404)
+    response = jsonify({"index": index, "title": sections[index].get("title", ''), "links": sections[index].get("links") or []})
+    response.set_etag(document_etag(document))
+    return response.make_conditional(request)
 
-@app.route('/api/settings', methods=['GET', 'POST'])
-def handle_settings():
+@app.route('/api/settings', methods=['GET', 'POST'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/settings', methods=['GET', 'POST'])
+def handle_settings(profile_name):
+    profile = get_profile(profile_name, create=request.method == 'POST')
     if request.method == 'POST':
-        return save_json_file(SETTINGS_FILE)
-    return get_json_file(SETTINGS_FILE)
+        return save_json_file(profile, 'settings')
+    return get_json_file(profile, 'settings')
 
-@app.route('/api/notes', methods=['GET', 'POST'])
-def handle_notes():
+@app.route('/api/notes', methods=['GET', 'POST'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/notes', methods=['GET', 'POST'])
+def handle_notes(profile_name):
+    """
+    Lists the notes with their titles and sizes. Clients of the single-scratchpad API of earlier
+    versions keep working: a GET also carries the text of the "scratchpad" note in `content`, unless
+    `?content=false` is given, and a POST of {"content": ...} saves that note. Both use the revision
+    of the listing, which changes with every note.
+    """
+    profile = get_profile(profile_name, create=request.method == 'POST')
     if request.method == 'POST':
-        return save_json_file(NOTES_FILE)
-    return get_json_file(NOTES_FILE)
+        return save_legacy_scratchpad(profile)
+    if request.args.get('content') == 'false':
+        return get_json_file(profile, 'notes')
+    with profile.commit_lock(shared=True):
+        listing = profile.read('notes')
+        response = jsonify(legacy_notes_view(profile, listing))
+    response.set_etag(document_etag(listing))
+    return response.make_conditional(request)
 
-@app.route('/api/uptime-kuma-status')
-def get_uptime_kuma_status():
+def legacy_notes_view(profile, listing):
+    note = profile.read_note(LEGACY_NOTE_ID)
+    return {**listing.data, "content": note.data["content"] if note.revision else ''}
+
+def save_legacy_scratchpad(profile):
+    data = request_json()
+    if not isinstance(data, dict) or not isinstance(data.get('content'), str):
+        return jsonify({"error": "Request body must be a JSON object with a 'content' string."}), 400
+    note = profile.read_note(LEGACY_NOTE_ID)
+    title = note.data["title"] if note.revision else "Scratchpad"
+    try:
+        profile.commit_note(LEGACY_NOTE_ID, title, data['content'], expected_listing_revision=requested_revision())
+    except RevisionConflict as e:
+        return revision_conflict_response(RevisionConflict(Document(e.current.revision, legacy_notes_view(profile, e.current))))
+    listing = profile.read('notes')
+    response = jsonify({"message": "Saved", "revision": listing.revision})
+    response.set_etag(str(listing.revision))
+    return response, 200
+
+@app.route('/api/notes/<note_id>', methods=['GET', 'POST', 'DELETE'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/notes/<note_id>', methods=['GET', 'POST', 'DELETE'])
+def handle_note(profile_name, note_id):
     """
-    Fetches and processes the status from an Uptime Kuma instance.
-    Includes detailed logging for debugging purposes.
+    Reads, saves or deletes one note. Reads return at most NOTE_PAGE_SIZE characters, paged with
+    `?offset=<n>&limit=<n>` (in characters); sending the revision from the first page in If-Match makes every later page
+    fail with 412 if the note changed in between. Saves take {"title": ..., "content": ...}
+    and create the note if it does not exist yet.
     """
-    uk_url = os.environ.get('UK_URL')
-    if not uk_url:
-        return jsonify({"enabled": False})
+    if not NOTE_ID_PATTERN.match(note_id):
+        abort(404)
+    profile = get_profile(profile_name, create=request.method == 'POST')
+    try:
+        if request.method == 'POST':
+            return save_note(profile, note_id)
+        if request.method == 'DELETE':
+            if not profile.delete_note(note_id, requested_revision()):
+                abort(404)
+            return jsonify({"message": "Deleted"}), 200
+    except RevisionConflict as e:
+        return revision_conflict_response(e)
+
+    document = profile.read_note(note_id)
+    if document.revision == 0:
+        abort(404)
+    stale = stale_read_response(document)
+    if stale:
+        return stale
+    content = document.data["content"]
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', NOTE_PAGE_SIZE, type=int)
+    limit = NOTE_PAGE_SIZE if limit < 0 else min(limit, NOTE_PAGE_SIZE)
+    page = content[offset:offset + limit]
+    response = jsonify({"id": note_id, "title": document.data["title"], "offset": offset,
+                        "total": len(content), "content": page})
+    response.set_etag(document_etag(document))
+    return response.make_conditional(request)
+
+def save_note(profile, note_id):
+    data = request_json()
+    if not isinstance(data, dict) or not isinstance(data.get('content'), str):
+        return jsonify({"error": "Request body must be a JSON object with a 'content' string."}), 400
+    title = str(data.get('title') or '').strip() or 'Untitled'
+    document = profile.commit_note(note_id, title, data['content'], requested_revision())
+    response = jsonify({"message": "Saved", "revision": document.revision})
+    response.set_etag(str(document.revision))
+    return response, 200
 
-    clean_uk_url = uk_url.rstrip('/')
-    heartbeat_api_url = f"{clean_uk_url}/api/status-page/heartbeat/all-checks"
+# --- Change Feed ---
+def sections_patch(old, new):
+    """
+    Describes the links document `new` as a change to `old`: its list of sections, where each
+    section that `old` already had is replaced by its index there. Returns None if the documents
+    hold more than sections or the changed sections exceed FEED_PATCH_MAX_SIZE.
+    """
+    if set(old) - {"sections"} or set(new) - {"sections"}:
+        return None
+    old_positions = {}
+    for index, section in enumerate(old.get("sections", [])):
+        old_positions.setdefault(json.dumps(section, sort_keys=True), index)
+    patch = [old_positions.get(json.dumps(section, sort_keys=True), section) for section in new.get("sections", [])]
+    if len(json.dumps([section for section in patch if not isinstance(section, int)])) > FEED_PATCH_MAX_SIZE:
+        return None
+    return patch
+
+
+class ChangeNotifier:
+    """
+    Wakes requests waiting on a profile's change feed. Rather than every waiting request polling
+    the change log, one watcher thread per process checks the profiles that have waiters every
+    `interval` seconds, and commits made by this process wake their waiters at once.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._watched = {}
+        self._condition = threading.Condition()
+        self._watcher = None
+
+    def wait(self, profile, since, timeout):
+        """Blocks until the profile's change sequence moves past `since` or `timeout` seconds pass; returns the sequence."""
+        seq = profile.read_changes()["seq"]
+        if seq != since or timeout <= 0:
+            return seq
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._run, name='change-notifier', daemon=True)
+                self._watcher.start()
+            watch = self._watched.setdefault(profile.name, {"profile": profile, "seq": seq, "waiters": 0})
+            watch["waiters"] += 1
+            try:
+                while watch["seq"] == since and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+                return watch["seq"]
+            finally:
+                watch["waiters"] -= 1
+                if not watch["waiters"]:
+                    del self._watched[profile.name]
+
+    def notify(self, profile, seq):
+        with self._condition:
+            watch = self._watched.get(profile.name)
+            if watch and watch["seq"] != seq:
+                watch["seq"] = seq
+                self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._condition:
+                watched = [watch["profile"] for watch in self._watched.values()]
+            for profile in watched:
+                try:
+                    self.notify(profile, profile.read_changes()["seq"])
+                except (OSError, ValueError) as e:
+                    log_message(f"[Changes] Warning: Could not read the change log of profile '{profile.name}'. Details: {e}")
+
+
+change_notifier = ChangeNotifier(FEED_POLL_INTERVAL)
+
+def wait_for_changes(profile, since, timeout):
+    return change_notifier.wait(profile, since, timeout)
+
+def change_payload(profile, since):
+    """Describes what changed after `since`: new revisions, the data of FEED_INLINE_DOCS and links patches."""
+    seq, changed, patches, reset = profile.changes_since(since)
+    changes = {}
+    for doc, revision in changed.items():
+        try:
+            if revision is None:
+                raise FileNotFoundError(doc)
+            document = profile.read(doc)
+        except FileNotFoundError:
+            changes[doc] = {"revision": None}  # A deleted note
+            continue
+        changes[doc] = {"revision": document.revision}
+        if doc in FEED_INLINE_DOCS:
+            changes[doc]["data"] = document.data
+        elif doc in patches and revision == document.revision:
+            changes[doc]["patch"] = patches[doc]
+    return {"seq": seq, "reset": reset, "changes": changes}
+
+def feed_position(profile):
+    """The current sequence and document revisions, for clients starting to follow the feed."""
+    return {"seq": profile.read_changes()["seq"], "revisions": {doc: profile.read(doc).revision for doc in DOCUMENTS}}
+
+@app.route('/api/changes', defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/changes')
+def get_changes(profile_name):
+    """
+    Returns the changes committed after `?since=<seq>`. With `&wait=<seconds>` the request is
+    held open (long-poll) until something changes. Without `since`, returns the current position.
+    """
+    profile = get_profile(profile_name)
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify(feed_position(profile))
+    wait_for_changes(profile, since, min(request.args.get('wait', 0, type=float), FEED_MAX_WAIT))
+    return jsonify(change_payload(profile, since))
+
+@app.route('/api/changes/stream', defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/changes/stream')
+def stream_changes(profile_name):
+    """
+    Server-sent event stream of the change feed. A new subscriber first gets a `hello` event with
+    the current revisions; a reconnecting one (Last-Event-ID) gets everything it missed. The
+    stream ends after FEED_STREAM_LIFETIME seconds and the browser reconnects on its own.
+    """
+    profile = get_profile(profile_name)
+    resume_from = request.headers.get('Last-Event-ID', request.args.get('since', ''))
+    since = int(resume_from) if resume_from.isdigit() else None
+
+    def events():
+        cursor = since
+        yield "retry: 3000\n\n"
+        if cursor is None:
+            position = feed_position(profile)
+            cursor = position["seq"]
+            yield f"id: {cursor}\nevent: hello\ndata: {json.dumps(position)}\n\n"
+        end = time.monotonic() + FEED_STREAM_LIFETIME
+        while time.monotonic() < end:
+            seq = wait_for_changes(profile, cursor, FEED_HEARTBEAT_INTERVAL)
+            if seq == cursor:
+                yield ": keep-alive\n\n"
+                continue
+            payload = change_payload(profile, cursor)
+            cursor = payload["seq"]
+            yield f"id: {cursor}\nevent: change\ndata: {json.dumps(payload)}\n\n"
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# --- Click Tracking ---
+class ClickBuffer:
+    """
+    Counts link clicks in memory and periodically writes them to each profile in one merge,
+    so a burst of clicks costs a dictionary update each and one small file write per interval.
+    Every worker process keeps its own buffer; merges are serialized by the profile lock.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, profile_name, url):
+        now = time.time()
+        with self._lock:
+            clicks = self._pending.setdefault(profile_name, {})
+            if url not in clicks and len(clicks) >= CLICK_MAX_TRACKED:
+                return
+            clicks[url] = (clicks.get(url, (0, now))[0] + 1, now)
+            if self._flusher is None:
+                # Started on first use, so it runs in the worker process rather than the one that imported the app.
+                self._flusher = threading.Thread(target=self._run, name='click-flusher', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for profile_name, clicks in pending.items():
+            profile = profile_cache.get(profile_name)
+            if profile is None:
+                continue  # Removed since the clicks were recorded
+            try:
+                profile.add_clicks(clicks)
+            except Exception as e:
+                log_message(f"[Clicks] Could not save clicks for profile '{profile_name}': {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+click_buffer = ClickBuffer(CLICK_FLUSH_INTERVAL)
+
+@app.route('/api/click', methods=['POST'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/click', methods=['POST'])
+def record_click(profile_name):
+    """Counts a click on a link. Sent with navigator.sendBeacon, so the JSON body may come as text/plain."""
+    get_profile(profile_name)
+    if (request.content_length or 0) > CLICK_MAX_URL_LENGTH + 64:
+        abort(413)
+    try:
+        url = json.loads(request.get_data(as_text=True))['url']
+    except (ValueError, TypeError, KeyError):
+        return jsonify({"error": "Expected a JSON object with a 'url'."}), 400
+    if not isinstance(url, str) or not url or len(url) > CLICK_MAX_URL_LENGTH:
+        return jsonify({"error": "Invalid 'url'."}), 400
+    click_buffer.add(profile_name, url)
+    return '', 204
+
+@app.route('/api/clicks', defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/clicks')
+def get_click_scores(profile_name):
+    """Returns the time-decayed click score of every clicked link URL."""
+    return jsonify({"scores": get_profile(profile_name).click_scores()})
+
+# --- Batch Requests ---
+BATCH_MAX_OPERATIONS = 50
+BATCH_READ_ONLY_RESOURCES = ('widgets',)
+BATCH_SERVER_MAINTAINED_RESOURCES = ('notes',)
+# Read-only views computed from a document in the batch's snapshot: name -> (document, view).
+BATCH_DERIVED_RESOURCES = {'sections': ('links', section_index)}
+
+def batch_revision(value):
+    """Accepts a batch operation's `ifMatch` as a number or an ETag string like '"3"' or '"3-<digest>"'."""
+    if value is None or isinstance(value, int):
+        return value
+    return parse_document_etag(str(value).strip().strip('"'))[0]
+
+@app.route('/api/batch', methods=['POST'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/batch', methods=['POST'])
+def handle_batch(profile_name):
+    """
+    Runs an ordered list of reads and writes in one request, e.g.
+    {"operations": [{"op": "get", "resource": "links"}, {"op": "put", "resource": "settings", "data": {...}, "ifMatch": 3}]}
+    All operations see one consistent snapshot, reads see earlier writes of the same batch,
+    and the writes are committed together in one step or, on any conflict, not at all.
+    """
+    body = request_json()
+    operations = body.get('operations') if isinstance(body, dict) else None
+    if not isinstance(operations, list) or not 0 < len(operations) <= BATCH_MAX_OPERATIONS:
+        return jsonify({"error": f"Expected 1 to {BATCH_MAX_OPERATIONS} operations."}), 400
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in ('get', 'put'):
+            return jsonify({"error": "Each operation needs an 'op' of 'get' or 'put'.", "index": index}), 400
+        readable = operation.get('op') == 'get' and (operation.get('resource') in BATCH_READ_ONLY_RESOURCES
+                                                     or operation.get('resource') in BATCH_DERIVED_RESOURCES)
+        if operation.get('resource') not in DOCUMENTS and not readable:
+            return jsonify({"error": f"Unknown resource '{operation.get('resource')}'.", "index": index}), 400
+        if operation['op'] == 'put' and operation.get('resource') in BATCH_SERVER_MAINTAINED_RESOURCES:
+            return jsonify({"error": f"'{operation['resource']}' is maintained by the server.", "index": index}), 400
+        if operation['op'] == 'put' and not isinstance(operation.get('data'), dict):
+            return jsonify({"error": "A 'put' operation needs a JSON object as 'data'.", "index": index}), 400
+
+    has_writes = any(operation['op'] == 'put' for operation in operations)
+    profile = get_profile(profile_name, create=has_writes)
+    results, snapshot, pending, conflicts = [], {}, {}, []
+    try:
+        with profile.commit_lock(shared=not has_writes):
+            for index, operation in enumerate(operations):
+                resource = operation['resource']
+                if resource in BATCH_READ_ONLY_RESOURCES:
+                    results.append(None)  # Filled in after the lock is released
+                    continue
+                if resource in BATCH_DERIVED_RESOURCES:
+                    source, view = BATCH_DERIVED_RESOURCES[resource]
+                    if source not in snapshot:
+                        snapshot[source] = profile.read(source)
+                    document = pending.get(source, snapshot[source])
+                    results.append({"status": 200, "revision": document.revision, "data": view(document.data)})
+                    continue
+                if resource not in snapshot:
+                    snapshot[resource] = profile.read(resource)
+                if operation['op'] == 'get':
+                    document = pending.get(resource, snapshot[resource])
+                    results.append({"status": 200, "revision": document.revision, "data": document.data})
+                    continue
+                expected = batch_revision(operation.get('ifMatch'))
+                current = snapshot[resource]
+                if expected is not None and expected != current.revision:
+                    conflicts.append({"index": index, "resource": resource, "revision": current.revision, "data": current.data})
+                pending[resource] = Document(current.revision + 1, operation['data'])
+                results.append({"status": 200, "revision": current.revision + 1})
+            if conflicts:
+                return jsonify({"error": "Some documents were changed elsewhere; nothing was saved.", "conflicts": conflicts}), 409
+            if pending:
+                profile.apply_commit(pending)
+                if snapshot_writer:
+                    snapshot_writer.schedule(profile)
+    except Exception as e:
+        return jsonify({"error": f"Batch failed: {e}"}), 500
+
+    for index, operation in enumerate(operations):
+        if operation['resource'] == 'widgets':
+            results[index] = {"status": 200, "data": widget_scheduler.collect(enabled_widgets(), WIDGET_WAIT_TIMEOUT)}
+    revisions = {resource: document.revision for resource, document in {**snapshot, **pending}.items()}
+    return jsonify({"results": results, "revisions": revisions})
+
+@app.route('/api/import', methods=['POST'], defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/import', methods=['POST'])
+def import_bookmarks(profile_name):
+    """
+    Imports a browser bookmark export into the profile's links with a single write.
+    Accepts the file as the raw request body or as a multipart upload named `file`.
+    """
+    profile = get_profile(profile_name, create=True)
+    # Only multipart bodies are parsed as a form: reading request.files would consume a raw body
+    # sent as application/x-www-form-urlencoded (curl --data-binary's default).
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    stream = upload.stream if upload else request_body_stream()
+    expected = requested_revision()
+    try:
+        document = profile.read('links')
+        importer = BookmarkImporter(document.data)
+        parse_bookmark_export(stream, importer.add)
+        if importer.imported:
+            # Without If-Match, still refuse to overwrite links saved while the import was parsed.
+            saved = profile.commit('links', importer.links(), document.revision if expected is None else expected)
+        else:
+            saved = document
+    except RevisionConflict as e:
+        return revision_conflict_response(e)
+    except (ValueError, UnicodeDecodeError, OSError, EOFError) as e:
+        return jsonify({"error": f"Could not parse bookmark export: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Import failed: {e}"}), 500
+    log_message(f"[Import] Profile '{profile.name}': {importer.summary()}")
+    if snapshot_writer and importer.imported:
+        snapshot_writer.schedule(profile)
+    response = jsonify({**importer.summary(), "revision": saved.revision})
+    response.set_etag(str(saved.revision))
+    return response
+
+def parse_uk_instances(value):
+    """Parses UK_URL into a list of (base url, status page slug) pairs."""
+    instances = []
+    for entry in value.split(','):
+        url, _, slug = entry.strip().partition('|')
+        if url.strip():
+            instances.append((url.strip().rstrip('/'), slug.strip() or UK_DEFAULT_SLUG))
+    return instances
+
+def uk_configured():
+    """Whether UK_URL names at least one instance; a value like " , " names none."""
+    return bool(parse_uk_instances(os.environ.get('UK_URL', '')))
+
+def fetch_uptime_kuma_instance(clean_uk_url, slug, timeout):
+    """
+    Fetches and processes the status of one Uptime Kuma status page.
+    Includes detailed logging for debugging purposes.
+    """
+    heartbeat_api_url = f"{clean_uk_url}/api/status-page/heartbeat/{slug}"
 
     log_message("\n--- [Uptime Kuma] Starting status fetch ---")
     log_message(f"[Uptime Kuma] Requesting URL: {heartbeat_api_url}")
 
     try:
-        response = requests.get(heartbeat_api_url, timeout=10)
+        response = requests.get(heartbeat_api_url, timeout=timeout)
         log_message(f"[Uptime Kuma] Received HTTP status code: {response.status_code}")
         response.raise_for_status()
         data = response.json()
 
         overall_status = "ok"
         heartbeat_list = data.get("heartbeatList", {})
+        monitors = {}
 
         if not heartbeat_list:
             log_message("[Uptime Kuma] Warning: heartbeatList is empty or missing in the response.")
         
+        # Every monitor's latest status is kept, so links can show the status of their own monitor.
         for monitor_id, heartbeats in heartbeat_list.items():
             if heartbeats:
-                heartbeats.sort(key=lambda x: x.get('time', ''), reverse=True)
-                
-                latest_heartbeat = heartbeats[0]
+                latest_heartbeat = max(heartbeats, key=lambda x: x.get('time', ''))
                 latest_status = latest_heartbeat.get("status")
+                monitors[str(monitor_id)] = latest_status
                 
                 if latest_status != 1:
                     overall_status = "investigate"
-                    log_message(f"[Uptime Kuma] !! Monitor '{monitor_id}' triggered 'investigate' state with status '{latest_status}'. Halting checks.")
+                    log_message(f"[Uptime Kuma] !! Monitor '{monitor_id}' triggered 'investigate' state with status '{latest_status}'.")
                     log_message(f"[Uptime Kuma] !! Failing heartbeat data: {latest_heartbeat}")
-                    break 
                 else:
                     log_message(f"[Uptime Kuma] Monitor '{monitor_id}' latest status is OK (1)")
             else:
@@ -1051,18 +3881,433 @@ def get_uptime_kuma_status():
         log_message(f"[Uptime Kuma] Final determined overall_status: '{overall_status}'")
         log_message("--- [Uptime Kuma] Finished status fetch ---\n")
         
-        return jsonify({
-            "enabled": True,
-            "status": overall_status,
-            "url": clean_uk_url
-        })
+        return {"url": clean_uk_url, "slug": slug, "status": overall_status, "monitors": monitors}
 
     except requests.exceptions.RequestException as e:
         log_message(f"[Uptime Kuma] ERROR: Could not connect to Uptime Kuma. Details: {e}")
-        return jsonify({"enabled": True, "status": "error", "message": f"Could not connect to Uptime Kuma: {e}", "url": clean_uk_url}), 500
+        return {"url": clean_uk_url, "slug": slug, "status": "error", "message": f"Could not connect to Uptime Kuma: {e}"}
     except Exception as e:
         log_message(f"[Uptime Kuma] ERROR: An unexpected error occurred. Details: {e}")
-        return jsonify({"enabled": True, "status": "error", "message": f"An unexpected error occurred: {e}", "url": clean_uk_url}), 500
+        return {"url": clean_uk_url, "slug": slug, "status": "error", "message": f"An unexpected error occurred: {e}"}
+
+def fetch_uptime_kuma_monitor_urls(clean_uk_url, slug, timeout):
+    """
+    Fetches the monitors of one status page as {monitor id: url or hostname}. Uptime Kuma only
+    publishes a monitor's URL when "Show Clickable Link" is enabled for it on the status page.
+    """
+    try:
+        response = requests.get(f"{clean_uk_url}/api/status-page/{slug}", timeout=timeout)
+        response.raise_for_status()
+        groups = response.json().get("publicGroupList") or []
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log_message(f"[Uptime Kuma] Warning: Could not fetch the monitor list of '{slug}'. Details: {e}")
+        return {}
+    monitor_urls = {}
+    for group in groups:
+        for monitor in group.get("monitorList") or []:
+            # Monitors without a URL of their own (ping, port, ...) report the placeholder "https://".
+            url = monitor.get("url") if monitor.get("url") != 'https://' else None
+            target = url or monitor.get("hostname")
+            if target:
+                monitor_urls[str(monitor.get("id"))] = target
+    return monitor_urls
+
+class UptimeKumaFetcher:
+    """
+    Runs the requests to Uptime Kuma instances in parallel, so one slow site does not delay the
+    others. At most one request per instance and kind (status or monitor list) is in flight: one
+    that outlives its deadline is waited on again rather than repeated. The pool has a thread for
+    every such slot, so requests stuck on a dead site never make the healthy ones queue.
+    """
+
+    KINDS = 2
+
+    def __init__(self):
+        self._executor = None
+        self._size = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, url, slug, fetch):
+        """Starts `fetch(url, slug, UK_TIMEOUT)`, or returns the future of the same request still running."""
+        key = (kind, url, slug)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            size = max(self.KINDS * len(parse_uk_instances(os.environ.get('UK_URL', ''))), len(self._inflight) + 1)
+            if size > self._size:
+                # Threads of the old pool finish the requests they are running, then exit.
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='uptime-kuma')
+                self._size = size
+            future = self._executor.submit(fetch, url, slug, UK_TIMEOUT)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+uk_fetcher = UptimeKumaFetcher()
+
+def fetch_uptime_kuma_status():
+    """
+    Fetches every configured Uptime Kuma instance concurrently under one shared deadline
+    and merges the results. Returns the payload and HTTP status code.
+    """
+    instances = parse_uk_instances(os.environ.get('UK_URL', ''))
+    if not instances:
+        return {"enabled": False}, 200
+    deadline = time.monotonic() + UK_TIMEOUT
+    futures = [uk_fetcher.submit('status', url, slug, fetch_uptime_kuma_instance) for url, slug in instances]
+    wait(futures, timeout=max(0, deadline - time.monotonic()))
+
+    results = []
+    for (url, slug), future in zip(instances, futures):
+        if future.done():
+            results.append(future.result())
+        else:
+            log_message(f"[Uptime Kuma] ERROR: '{url}' did not answer within {UK_TIMEOUT}s.")
+            results.append({"url": url, "slug": slug, "status": "error", "message": f"Timed out after {UK_TIMEOUT}s"})
+
+    statuses = [result["status"] for result in results]
+    if all(status == "error" for status in statuses):
+        overall_status = "error"
+    elif all(status == "ok" for status in statuses):
+        overall_status = "ok"
+    else:
+        overall_status = "investigate"
+    # Link the indicator to the first instance that needs attention.
+    attention = next((result for result in results if result["status"] != "ok"), results[0])
+    payload = {"enabled": True, "status": overall_status, "url": attention["url"], "instances": results}
+    if overall_status == "error":
+        payload["message"] = "; ".join(f"{result['url']}: {result['message']}" for result in results)
+        return payload, 500
+    return payload, 200
+
+# --- Widgets ---
+Widget = namedtuple('Widget', ['name', 'title', 'interval', 'fetch'])
+WIDGETS = {}
+
+def widget(name, title, interval):
+    """Registers a widget data source refreshed every `interval` seconds. The function returns JSON data or raises."""
+    def register(fetch):
+        WIDGETS[name] = Widget(name, title, interval, fetch)
+        return fetch
+    return register
+
+def enabled_widgets():
+    names = [name.strip() for name in os.environ.get('WIDGETS', '').split(',') if name.strip()]
+    if uk_configured() and 'uptime-kuma' not in names:
+        names.insert(0, 'uptime-kuma')
+    return [WIDGETS[name] for name in names if name in WIDGETS]
+
+def run_widget(widget):
+    """Runs a widget's fetch and wraps the outcome, including failures, in a cacheable result."""
+    try:
+        return {"title": widget.title, "data": widget.fetch(), "updated": time.time()}
+    except Exception as e:
+        log_message(f"[Widgets] ERROR: Widget '{widget.name}' failed. Details: {e}")
+        return {"title": widget.title, "error": str(e), "updated": time.time()}
+
+
+class WidgetScheduler:
+    """
+    Refreshes widget data on a worker pool. Results live in the shared cache, so each widget is
+    fetched at most once per interval across all workers. Concurrent requests for a widget
+    share one in-flight fetch, and stale data is returned while a refresh is running.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='widget')
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self, widget):
+        body = shared_cache.fetch(f"widget:{widget.name}", widget.interval,
+                                  lambda: json.dumps(run_widget(widget)).encode('utf-8'))
+        return json.loads(body)
+
+    def _submit(self, widget):
+        with self._lock:
+            future = self._inflight.get(widget.name)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._refresh, widget)
+            self._inflight[widget.name] = future
+        future.add_done_callback(lambda done: self._forget(widget.name, done))
+        return future
+
+    def _forget(self, name, future):
+        with self._lock:
+            if self._inflight.get(name) is future:
+                del self._inflight[name]
+
+    def collect(self, widgets, timeout):
+        """
+        Returns the latest result of every widget in one dict. Expired widgets are refreshed in
+        the background; only widgets without any data yet are waited for, up to `timeout` seconds.
+        """
+        results, waiting = {}, {}
+        for widget in widgets:
+            try:
+                entry = shared_cache.get(f"widget:{widget.name}")
+            except sqlite3.Error:
+                entry = None
+            if entry is None or entry.expires_at <= time.time():
+                future = self._submit(widget)
+                if entry is None:
+                    waiting[widget.name] = future
+                    continue
+            results[widget.name] = json.loads(entry.value)
+        wait(waiting.values(), timeout=timeout)
+        for name, future in waiting.items():
+            results[name] = future.result() if future.done() else {"title": WIDGETS[name].title, "pending": True}
+        return results
+
+
+widget_scheduler = WidgetScheduler(WIDGET_WORKERS)
+
+@widget('uptime-kuma', 'Uptime Kuma', UK_CACHE_TTL)
+def uptime_kuma_widget():
+    return fetch_uptime_kuma_status()[0]
+
+# The monitor lists are a widget of their own, only read by /api/link-status: they are refreshed
+# in the background on their own schedule, so a slow or failing list never delays the status.
+@widget('uptime-kuma-monitors', 'Uptime Kuma monitors', UK_MONITORS_TTL)
+def uptime_kuma_monitors_widget():
+    instances = parse_uk_instances(os.environ.get('UK_URL', ''))
+    futures = [uk_fetcher.submit('monitors', url, slug, fetch_uptime_kuma_monitor_urls) for url, slug in instances]
+    wait(futures, timeout=UK_TIMEOUT)
+    return [{"url": url, "slug": slug, "monitors": future.result() if future.done() else {}}
+            for (url, slug), future in zip(instances, futures)]
+
+def read_cpu_times():
+    """Returns (idle, total) jiffies from the aggregate CPU line of /proc/stat."""
+    with open('/proc/stat', 'r') as f:
+        values = [int(value) for value in f.readline().split()[1:]]
+    return values[3] + values[4], sum(values)
+
+@widget('host', 'Host', 15)
+def host_widget():
+    """CPU, memory, disk and uptime of the host, read from /proc."""
+    idle_before, total_before = read_cpu_times()
+    time.sleep(0.25)
+    idle_after, total_after = read_cpu_times()
+    cpu_percent = 100 * (1 - (idle_after - idle_before) / max(1, total_after - total_before))
+
+    meminfo = {}
+    with open('/proc/meminfo', 'r') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            meminfo[key] = int(value.split()[0]) * 1024
+    memory_total = meminfo['MemTotal']
+    memory_available = meminfo.get('MemAvailable', meminfo['MemFree'])
+
+    with open('/proc/loadavg', 'r') as f:
+        load = [float(value) for value in f.read().split()[:3]]
+    with open('/proc/uptime', 'r') as f:
+        uptime = float(f.read().split()[0])
+    disk = shutil.disk_usage(CONFIG_DIR)
+
+    return {
+        "cpuPercent": round(cpu_percent, 1),
+        "load": load,
+        "memoryPercent": round(100 * (memory_total - memory_available) / memory_total, 1),
+        "memoryTotal": memory_total,
+        "diskPercent": round(100 * disk.used / disk.total, 1),
+        "diskTotal": disk.total,
+        "uptime": int(uptime),
+    }
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket, used to talk to the local Docker engine."""
+
+    def __init__(self, socket_path, timeout=5):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+@widget('docker', 'Docker', 30)
+def docker_widget():
+    """Container states from the Docker engine API on DOCKER_SOCKET (mount it into the container to use this)."""
+    conn = UnixHTTPConnection(DOCKER_SOCKET)
+    try:
+        conn.request('GET', '/containers/json?all=1')
+        response = conn.getresponse()
+        body = response.read()
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"Docker API returned HTTP {response.status}")
+    containers = sorted(({
+        "name": (container.get('Names') or ['?'])[0].lstrip('/'),
+        "state": container.get('State', 'unknown'),
+        "status": container.get('Status', ''),
+    } for container in json.loads(body)), key=lambda container: container['name'])
+    states = {}
+    for container in containers:
+        states[container['state']] = states.get(container['state'], 0) + 1
+    return {"states": states, "containers": containers}
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+def fetch_feed(url):
+    """Fetches the newest RSS_MAX_ITEMS entries of an RSS 2.0 or Atom feed."""
+    try:
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        root = ElementTree.fromstring(response.content)
+    except (requests.exceptions.RequestException, ElementTree.ParseError) as e:
+        return {"url": url, "error": str(e)}
+    title = root.findtext('channel/title') or root.findtext(f'{ATOM_NS}title') or url
+    items = []
+    for item in itertools.islice(root.iter('item'), RSS_MAX_ITEMS):
+        items.append({"title": (item.findtext('title') or '').strip(), "link": (item.findtext('link') or '').strip()})
+    for entry in itertools.islice(root.iter(f'{ATOM_NS}entry'), RSS_MAX_ITEMS - len(items)):
+        link = entry.find(f'{ATOM_NS}link')
+        items.append({"title": (entry.findtext(f'{ATOM_NS}title') or '').strip(), "link": link.get('href', '') if link is not None else ''})
+    return {"url": url, "title": title.strip(), "items": items}
+
+@widget('rss', 'News', 900)
+def rss_widget():
+    """Latest entries of the feeds in RSS_FEEDS, fetched in parallel."""
+    if not RSS_FEEDS:
+        raise RuntimeError("No feeds configured in RSS_FEEDS.")
+    with ThreadPoolExecutor(max_workers=min(8, len(RSS_FEEDS)), thread_name_prefix='rss') as pool:
+        return {"feeds": list(pool.map(fetch_feed, RSS_FEEDS))}
+
+@app.route('/api/widgets')
+def get_widgets():
+    """Returns the data of all enabled widgets in one response, plus how often the client should poll."""
+    widgets = enabled_widgets()
+    interval = min((widget.interval for widget in widgets), default=60)
+    return jsonify({"widgets": widget_scheduler.collect(widgets, WIDGET_WAIT_TIMEOUT), "interval": max(interval, 5)})
+
+@app.route('/api/uptime-kuma-status')
+def get_uptime_kuma_status():
+    """Serves the Uptime Kuma status on its own; it shares the widget's cached result."""
+    if not uk_configured():
+        return jsonify({"enabled": False})
+    result = widget_scheduler.collect([WIDGETS['uptime-kuma']], WIDGET_WAIT_TIMEOUT)['uptime-kuma']
+    payload = result.get('data') or {"enabled": True, "status": "error", "message": result.get('error', 'Status is still loading.')}
+    return jsonify(payload), 500 if payload.get('status') == 'error' else 200
+
+@app.route('/api/link-status', defaults={'profile_name': DEFAULT_PROFILE})
+@app.route('/api/p/<profile_name>/link-status')
+def get_link_status(profile_name):
+    """
+    Returns the Uptime Kuma status of each monitored link as {"statuses": {link url: status}},
+    using Uptime Kuma's codes: 0 down, 1 up, 2 pending, 3 maintenance. Unmonitored links are left out.
+    """
+    profile = get_profile(profile_name)
+    if not uk_configured():
+        return jsonify({"enabled": False, "statuses": {}})
+    results = widget_scheduler.collect([WIDGETS['uptime-kuma'], WIDGETS['uptime-kuma-monitors']], WIDGET_WAIT_TIMEOUT)
+    instances = (results['uptime-kuma'].get('data') or {}).get('instances', [])
+    return jsonify({"enabled": True, "statuses": profile.link_statuses(instances, results['uptime-kuma-monitors'])})
+
+# --- Request Profiling ---
+PROFILE_FILE_PATTERN = re.compile(r'^(\d+)-([A-Z]+)-(\d+\.\d)ms-(\w*)\.prof$')
+
+def token_matches(token, expected):
+    """
+    Compares a header value with the expected token in constant time. WSGI decodes headers as latin-1,
+    so encoding them back gives the bytes sent; compare_digest rejects non-ASCII str outright.
+    """
+    return hmac.compare_digest(token.encode('latin-1', 'replace'), expected.encode('utf-8'))
+
+class ProfilingMiddleware:
+    """
+    Runs selected requests under cProfile and saves their stats to `directory`, one .prof file each.
+    It wraps the whole WSGI app, so routing, request hooks and compression show up in the profile.
+    Responses that stream their body (the change feed) are only profiled up to the first byte.
+    """
+
+    def __init__(self, wsgi_app, directory, token, sample_rate, max_files):
+        self.wsgi_app = wsgi_app
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        token = environ.get('HTTP_X_PROFILE_TOKEN')
+        flagged = token is not None and token_matches(token, self.token)
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (flagged or sampled) or path.startswith('/api/profiling'):
+            return self.wsgi_app(environ, start_response)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        response = profiler.runcall(self.wsgi_app, environ, start_response)
+        try:
+            self._save(profiler, environ.get('REQUEST_METHOD', 'GET'), path, time.perf_counter() - started)
+        except OSError as e:
+            log_message(f"[Profiling] Could not save profile of {path}: {e}")
+        return response
+
+    def _save(self, profiler, method, path, duration):
+        slug = re.sub(r'\W+', '_', path).strip('_')[:80]
+        name = f"{int(time.time() * 1000)}-{method}-{duration * 1000:.1f}ms-{slug}.prof"
+        tmp_path = os.path.join(self.directory, f".{name}.tmp")
+        profiler.dump_stats(tmp_path)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        log_message(f"[Profiling] {method} {path} took {duration * 1000:.1f} ms; saved {name}")
+        captured = sorted(entry for entry in os.listdir(self.directory) if PROFILE_FILE_PATTERN.match(entry))
+        for old in captured[:-self.max_files]:
+            os.unlink(os.path.join(self.directory, old))
+
+def require_profiling_token():
+    token = request.headers.get('X-Profile-Token', '')
+    if not token_matches(token, PROFILING_TOKEN):
+        abort(403)
+
+def list_request_profiles():
+    """Lists the captured profiles, newest first."""
+    require_profiling_token()
+    profiles = []
+    for name in sorted(os.listdir(PROFILING_DIR), reverse=True):
+        match = PROFILE_FILE_PATTERN.match(name)
+        if not match:
+            continue
+        captured_ms, method, duration, slug = match.groups()
+        profiles.append({
+            "name": name, "method": method, "request": slug, "durationMs": float(duration),
+            "capturedAt": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(int(captured_ms) / 1000)),
+            "size": os.path.getsize(os.path.join(PROFILING_DIR, name)),
+        })
+    return jsonify({"profiles": profiles})
+
+def download_request_profile(name):
+    """Downloads one profile; open it with pstats, snakeviz or flameprof."""
+    require_profiling_token()
+    if not PROFILE_FILE_PATTERN.match(name):
+        abort(404)
+    return send_from_directory(PROFILING_DIR, name, as_attachment=True, mimetype='application/octet-stream')
+
+def enable_request_profiling():
+    """Installs the profiling middleware and its routes; when profiling is off nothing is installed."""
+    if not PROFILING_TOKEN:
+        log_message("[Profiling] REQUEST_PROFILING is set but PROFILING_TOKEN is empty; profiling stays off.")
+        return
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, PROFILING_DIR, PROFILING_TOKEN, PROFILING_SAMPLE_RATE, PROFILING_MAX_FILES)
+    app.add_url_rule('/api/profiling', 'list_request_profiles', list_request_profiles)
+    app.add_url_rule('/api/profiling/<name>', 'download_request_profile', download_request_profile)
+
+if REQUEST_PROFILING:
+    enable_request_profiling()
 
 def main():
     """Main function to run initialization."""
@@ -11,5 +11,10 @@ echo "--- Initialization complete ---"
 
 # Now that initialization is guaranteed to be done, start Gunicorn.
 # The --access-logfile - and --error-logfile - flags will direct logs to the Docker console.
+# Writes are safe across workers, so GUNICORN_WORKERS can be raised to scale out.
+# Gevent workers hold each open tab's live-update stream as a cheap greenlet, so idle streams
+# never take a slot that other requests need; GUNICORN_CONNECTIONS caps them per worker.
 echo "--- Starting Gunicorn ---"
-exec gunicorn --bind 0.0.0.0:8000 --access-logfile - --error-logfile - main:app
+exec gunicorn --bind 0.0.0.0:8000 --workers "${GUNICORN_WORKERS:-1}" \
+    --worker-class gevent --worker-connections "${GUNICORN_CONNECTIONS:-1000}" --timeout 120 \
+    --access-logfile - --error-logfile - main:app